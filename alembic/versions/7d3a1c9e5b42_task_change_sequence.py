@@ -0,0 +1,60 @@
+"""Task change sequence and tombstones
+
+Revision ID: 7d3a1c9e5b42
+Revises: 2cbf8f05db03
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7d3a1c9e5b42'
+down_revision: Union[str, None] = '2cbf8f05db03'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(sa.schema.CreateSequence(sa.Sequence('task_change_seq')))
+    # Существующие задачи получают значения последовательности при
+    # добавлении столбца за счет server_default.
+    op.add_column('tasks', sa.Column(
+        'change_seq', sa.BigInteger(),
+        server_default=sa.text("nextval('task_change_seq')"),
+        nullable=False
+    ))
+    op.create_index(
+        op.f('ix_tasks_change_seq'), 'tasks', ['change_seq'], unique=False
+    )
+    op.create_table('task_tombstones',
+    sa.Column('task_id', sa.UUID(), nullable=False),
+    sa.Column('change_seq', sa.BigInteger(),
+              server_default=sa.text("nextval('task_change_seq')"),
+              nullable=False),
+    sa.Column('deleted_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('task_id')
+    )
+    op.create_index(
+        op.f('ix_task_tombstones_change_seq'), 'task_tombstones',
+        ['change_seq'], unique=False
+    )
+    op.create_table('sync_horizon',
+    sa.Column('name', sa.String(length=50), nullable=False),
+    sa.Column('change_seq', sa.BigInteger(), nullable=False),
+    sa.PrimaryKeyConstraint('name')
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('sync_horizon')
+    op.drop_index(
+        op.f('ix_task_tombstones_change_seq'), table_name='task_tombstones'
+    )
+    op.drop_table('task_tombstones')
+    op.drop_index(op.f('ix_tasks_change_seq'), table_name='tasks')
+    op.drop_column('tasks', 'change_seq')
+    op.execute(sa.schema.DropSequence(sa.Sequence('task_change_seq')))
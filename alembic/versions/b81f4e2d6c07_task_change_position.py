@@ -0,0 +1,49 @@
+"""Task change position by transaction id
+
+Revision ID: b81f4e2d6c07
+Revises: 7d3a1c9e5b42
+Create Date: 2026-10-19 18:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81f4e2d6c07'
+down_revision: Union[str, None] = '7d3a1c9e5b42'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+CURRENT_XID = "(pg_current_xact_id()::text::bigint)"
+
+
+def upgrade() -> None:
+    # Существующие строки получают номер транзакции миграции: она
+    # завершится раньше любой транзакции, изменяющей задачи после нее.
+    for table in ('tasks', 'task_tombstones'):
+        op.add_column(table, sa.Column(
+            'change_xid', sa.BigInteger(),
+            server_default=sa.text(CURRENT_XID), nullable=False
+        ))
+        op.drop_index(op.f(f'ix_{table}_change_seq'), table_name=table)
+        op.create_index(
+            f'ix_{table}_change_position', table,
+            ['change_xid', 'change_seq'], unique=False
+        )
+    op.add_column('sync_horizon', sa.Column(
+        'change_xid', sa.BigInteger(), server_default='0', nullable=False
+    ))
+
+
+def downgrade() -> None:
+    op.drop_column('sync_horizon', 'change_xid')
+    for table in ('task_tombstones', 'tasks'):
+        op.drop_index(f'ix_{table}_change_position', table_name=table)
+        op.create_index(
+            op.f(f'ix_{table}_change_seq'), table, ['change_seq'],
+            unique=False
+        )
+        op.drop_column(table, 'change_xid')
@@ -0,0 +1,97 @@
+"""Служебные команды приложения.
+
+Запуск: python -m app.cli <команда> [параметры]
+"""
+import argparse
+from datetime import datetime, timedelta
+
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.database import SessionLocal, create_db_engine
+from app.sharding import rebalance, shard_engines, shard_sessions
+from app.tasks.models import MOSCOW_TZ
+from app.tasks.service import TaskService
+
+
+def compact_tombstones(args: argparse.Namespace) -> None:
+    """Удалить устаревшие tombstone-записи удаленных задач.
+
+    В режиме шардирования компактизация выполняется на каждом шарде.
+    """
+    older_than = datetime.now(MOSCOW_TZ) - timedelta(days=args.days)
+    factories = shard_sessions or [SessionLocal]
+    deleted = 0
+    for factory in factories:
+        db = factory()
+        try:
+            deleted += TaskService.compact_tombstones(db, older_than)
+        finally:
+            db.close()
+    print(f"Удалено tombstone-записей: {deleted}")
+
+
+def rebalance_shards(args: argparse.Namespace) -> None:
+    """Перенести задачи на шарды согласно SHARD_DATABASE_URLS."""
+    if not shard_engines:
+        raise SystemExit("SHARD_DATABASE_URLS не задан")
+
+    # Шарды прежнего размещения и явно указанные, которых нет в новом
+    extra_urls = [
+        url for url in dict.fromkeys(
+            settings.PREVIOUS_SHARD_DATABASE_URLS + args.source
+        )
+        if url not in settings.SHARD_DATABASE_URLS
+    ]
+    extra_engines = [create_db_engine(url) for url in extra_urls]
+    targets = [Session(bind=engine) for engine in shard_engines]
+    sources = targets + [Session(bind=engine) for engine in extra_engines]
+    try:
+        moved = rebalance(sources, targets, batch_size=args.batch_size)
+    finally:
+        for session in sources:
+            session.close()
+        for engine in extra_engines:
+            engine.dispose()
+    print(f"Перенесено задач: {moved}")
+
+
+def main() -> None:
+    """Точка входа CLI."""
+    parser = argparse.ArgumentParser(description=settings.PROJECT_NAME)
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    compact = subparsers.add_parser(
+        "compact-tombstones", help="Компактизация tombstone-записей"
+    )
+    compact.add_argument(
+        "--days",
+        type=int,
+        default=settings.TOMBSTONE_RETENTION_DAYS,
+        help="Срок хранения tombstone-записей в днях"
+    )
+    compact.set_defaults(handler=compact_tombstones)
+
+    rebalance_parser = subparsers.add_parser(
+        "rebalance", help="Перераспределение задач по шардам"
+    )
+    rebalance_parser.add_argument(
+        "--source",
+        action="append",
+        default=[],
+        help="URL выводимого шарда, с которого нужно забрать задачи"
+    )
+    rebalance_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1000,
+        help="Количество задач в одной порции переноса"
+    )
+    rebalance_parser.set_defaults(handler=rebalance_shards)
+
+    args = parser.parse_args()
+    args.handler(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""Объединение одинаковых одновременных запросов на чтение (single-flight).
+
+Первый запрос с данным ключом выполняет загрузку, остальные запросы
+с тем же ключом, пришедшие до ее завершения (или в течение TTL после),
+получают тот же сериализованный ответ.
+"""
+import threading
+import time
+from typing import Any, Callable, Dict, Hashable, Optional, TypeVar
+
+from app import metrics
+
+COALESCED_REQUESTS = "coalesced_requests_total"
+metrics.register(
+    COALESCED_REQUESTS, "Запросы, получившие ответ другого запроса"
+)
+
+T = TypeVar("T")
+
+
+class _Call:
+    """Выполняющаяся или завершенная загрузка для одного ключа."""
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+        self.finished_at = 0.0
+
+
+class SingleFlight:
+    """Объединение одновременных загрузок с одинаковым ключом."""
+
+    def __init__(self, ttl_ms: int = 0):
+        self.ttl = ttl_ms / 1000
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(
+        self,
+        key: Hashable,
+        load: Callable[[], T],
+        timeout: Optional[float] = None
+    ) -> T:
+        """Вернуть результат load, разделяя его между запросами с ключом key.
+
+        Ошибка загрузки не разделяется: каждый ожидавший запрос
+        в этом случае выполняет загрузку самостоятельно. timeout - сколько
+        секунд запрос готов ждать чужую загрузку (остаток его дедлайна),
+        после этого он выполняет загрузку сам со своим дедлайном.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None and call.done.is_set() and (
+                time.monotonic() - call.finished_at >= self.ttl
+            ):
+                call = None
+            leader = call is None
+            if leader:
+                self._prune()
+                call = _Call()
+                self._calls[key] = call
+
+        if not leader:
+            if not call.done.wait(timeout) or call.error is not None:
+                return load()
+            metrics.inc(COALESCED_REQUESTS)
+            return call.result
+
+        try:
+            call.result = load()
+            return call.result
+        except BaseException as exc:
+            call.error = exc
+            raise
+        finally:
+            call.finished_at = time.monotonic()
+            call.done.set()
+            if self.ttl <= 0 or call.error is not None:
+                self._discard(key, call)
+
+    def forget(self, predicate: Callable[[Hashable], bool]) -> None:
+        """Прекратить разделение результатов для ключей по условию.
+
+        Запросы, пришедшие после вызова, выполнят загрузку заново,
+        даже если загрузка с тем же ключом еще выполняется.
+        """
+        with self._lock:
+            for key in [key for key in self._calls if predicate(key)]:
+                del self._calls[key]
+
+    def _prune(self) -> None:
+        """Удалить завершенные загрузки с истекшим TTL."""
+        now = time.monotonic()
+        expired = [
+            key for key, call in self._calls.items()
+            if call.done.is_set() and now - call.finished_at >= self.ttl
+        ]
+        for key in expired:
+            del self._calls[key]
+
+    def _discard(self, key: Hashable, call: _Call) -> None:
+        """Удалить загрузку, если ключ не был занят новой загрузкой."""
+        with self._lock:
+            if self._calls.get(key) is call:
+                del self._calls[key]
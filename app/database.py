@@ -1,9 +1,28 @@
+from zoneinfo import ZoneInfo
+
 from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 from app.config import settings
 
-engine = create_engine(settings.DATABASE_URL)
+# Часовой пояс, в котором хранятся даты без timezone
+DB_TZ = ZoneInfo(settings.DB_TIMEZONE)
+
+
+def create_db_engine(url: str) -> Engine:
+    """Создать движок с часовым поясом сессии DB_TIMEZONE.
+
+    Даты с timezone PostgreSQL записывает в столбцы без timezone
+    в часовом поясе сессии, поэтому он задается явно, а не берется
+    из настроек сервера.
+    """
+    return create_engine(
+        url, connect_args={"options": f"-c timezone={settings.DB_TIMEZONE}"}
+    )
+
+
+engine = create_db_engine(settings.DATABASE_URL)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
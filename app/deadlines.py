@@ -0,0 +1,238 @@
+"""Дедлайны запросов и отмена запросов к БД при отключении клиента.
+
+Дедлайн запроса переводится в statement_timeout каждой транзакции его
+сессий. Если клиент отключился, выполняющиеся запросы к PostgreSQL
+отменяются через pg_cancel_backend, и соединение сразу возвращается в пул.
+"""
+import asyncio
+import threading
+import time
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+from fastapi import Depends, Header, Request
+from sqlalchemy import event
+from sqlalchemy.engine import Connection, Engine
+from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
+
+from app import metrics
+from app.sharding import get_shard_dbs
+
+# Код ошибки PostgreSQL query_canceled (statement_timeout и pg_cancel_backend)
+QUERY_CANCELED = "57014"
+
+QUERY_CANCELLATIONS = "db_query_cancellations_total"
+metrics.register(QUERY_CANCELLATIONS, "Отмененные запросы к БД")
+
+
+class RequestQueries:
+    """Выполняющиеся транзакции запроса: движок и PID backend-процесса."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._backends: Dict[int, Tuple[Engine, int]] = {}
+        self.disconnected = False
+
+    def register(self, key: int, engine: Engine, pid: int) -> None:
+        """Запомнить backend-процесс, на котором выполняется транзакция."""
+        with self._lock:
+            if self.disconnected:
+                raise ConnectionAbortedError("Клиент отключился")
+            self._backends[key] = (engine, pid)
+
+    def unregister(self, key: int) -> None:
+        """Забыть backend-процесс после завершения транзакции."""
+        with self._lock:
+            self._backends.pop(key, None)
+
+    def cancel_all(self) -> int:
+        """Отменить все выполняющиеся запросы, вернуть их количество.
+
+        Блокировка удерживается до конца отмены. Регистрация снимается
+        при возврате соединения в пул (_release) под той же блокировкой,
+        поэтому соединение не достанется другому запросу, пока его
+        backend-процесс может получить отмену.
+        """
+        with self._lock:
+            self.disconnected = True
+            for engine, pid in self._backends.values():
+                _cancel_backend(engine, pid)
+            return len(self._backends)
+
+
+# Соединения, выданные из пула запросам: id DBAPI-соединения -> учет
+# запроса. Запись удаляется событием checkin до возврата в пул.
+_owners: Dict[int, RequestQueries] = {}
+_owners_lock = threading.Lock()
+
+
+def _cancel_backend(engine: Engine, pid: int) -> None:
+    """Отменить запрос backend-процесса.
+
+    Соединение открывается в обход пула: пул может быть исчерпан
+    как раз теми запросами, которые нужно отменить.
+    """
+    cargs, cparams = engine.dialect.create_connect_args(engine.url)
+    connection = engine.dialect.connect(*cargs, **cparams)
+    try:
+        cursor = connection.cursor()
+        cursor.execute("SELECT pg_cancel_backend(%s)", (pid,))
+        cursor.close()
+    finally:
+        connection.close()
+
+
+def _release(key: int, queries: Optional[RequestQueries] = None) -> None:
+    """Снять регистрацию соединения (только у queries, если задан)."""
+    with _owners_lock:
+        owner = _owners.get(key)
+        if owner is None or (queries is not None and owner is not queries):
+            return
+        del _owners[key]
+    owner.unregister(key)
+
+
+def _on_checkin(dbapi_connection, connection_record) -> None:
+    """Снять регистрацию backend-процесса до возврата соединения в пул."""
+    if dbapi_connection is not None:
+        _release(id(dbapi_connection))
+
+
+def _register(
+    connection: Connection, queries: RequestQueries, pid: int
+) -> int:
+    """Зарегистрировать backend-процесс соединения, вернуть ключ."""
+    engine = connection.engine
+    key = id(connection.connection.dbapi_connection)
+    with _owners_lock:
+        if not event.contains(engine, "checkin", _on_checkin):
+            event.listen(engine, "checkin", _on_checkin)
+    queries.register(key, engine, pid)
+    with _owners_lock:
+        _owners[key] = queries
+    return key
+
+
+def _track(
+    db: Session, deadline: float, queries: Optional[RequestQueries]
+) -> Callable[[], None]:
+    """Подключить дедлайн и учет транзакций к сессии, вернуть отключение."""
+    keys = set()
+
+    def after_begin(session, transaction, connection):
+        remaining_ms = max(1, int((deadline - time.monotonic()) * 1000))
+        connection.exec_driver_sql(
+            f"SET LOCAL statement_timeout = {remaining_ms}"
+        )
+        if queries is not None:
+            pid = connection.connection.dbapi_connection.get_backend_pid()
+            keys.add(_register(connection, queries, pid))
+
+    event.listen(db, "after_begin", after_begin)
+
+    def untrack():
+        event.remove(db, "after_begin", after_begin)
+        for key in keys:
+            _release(key, queries)
+
+    return untrack
+
+
+def with_deadline(default_ms: int) -> Callable:
+    """Dependency сессий шардов с дедлайном запроса.
+
+    default_ms - дедлайн маршрута по умолчанию, клиент может уменьшить
+    его заголовком X-Request-Timeout (в миллисекундах). Дедлайн
+    (time.monotonic) сохраняется в request.state.deadline.
+    """
+    def dependency(
+        request: Request,
+        x_request_timeout: Optional[int] = Header(
+            None, ge=1, description="Дедлайн запроса в миллисекундах"
+        ),
+        dbs: List[Session] = Depends(get_shard_dbs)
+    ) -> Iterator[List[Session]]:
+        timeout_ms = default_ms
+        if x_request_timeout is not None:
+            timeout_ms = min(timeout_ms, x_request_timeout)
+        deadline = time.monotonic() + timeout_ms / 1000
+        request.state.deadline = deadline
+        queries = getattr(request.state, "queries", None)
+
+        untracks = [_track(db, deadline, queries) for db in dbs]
+        try:
+            yield dbs
+        finally:
+            for untrack in untracks:
+                untrack()
+
+    return dependency
+
+
+def is_query_canceled(exc: Exception) -> bool:
+    """Проверить, что ошибка БД вызвана отменой запроса."""
+    orig = getattr(exc, "orig", None)
+    return getattr(orig, "pgcode", None) == QUERY_CANCELED
+
+
+class DisconnectCancelMiddleware:
+    """ASGI middleware, отменяющее запросы к БД при отключении клиента.
+
+    Тело запроса читается заранее, после чего отдельная задача ждет
+    http.disconnect от сервера, а приложение получает тело из буфера.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        messages = []
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                return
+            messages.append(message)
+            if not message.get("more_body", False):
+                break
+
+        queries = RequestQueries()
+        scope.setdefault("state", {})["queries"] = queries
+        disconnected = asyncio.Event()
+        response_complete = False
+
+        async def send_wrapper(message):
+            nonlocal response_complete
+            if (
+                message["type"] == "http.response.body"
+                and not message.get("more_body", False)
+            ):
+                response_complete = True
+            await send(message)
+
+        async def buffered_receive():
+            if messages:
+                return messages.pop(0)
+            await disconnected.wait()
+            return {"type": "http.disconnect"}
+
+        async def watch_disconnect():
+            while (await receive())["type"] != "http.disconnect":
+                pass
+            disconnected.set()
+            if response_complete:
+                return
+            cancelled = await run_in_threadpool(queries.cancel_all)
+            if cancelled:
+                metrics.inc(
+                    QUERY_CANCELLATIONS, cancelled, reason="disconnect"
+                )
+
+        watcher = asyncio.create_task(watch_disconnect())
+        try:
+            await self.app(scope, buffered_receive, send_wrapper)
+        finally:
+            watcher.cancel()
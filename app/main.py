@@ -1,8 +1,14 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
+from sqlalchemy.exc import OperationalError
 
+from app import metrics
 from app.config import settings
-from app.tasks.routes import router as tasks_router
+from app.deadlines import (
+    QUERY_CANCELLATIONS, DisconnectCancelMiddleware, is_query_canceled
+)
+from app.tasks.routes import NEXT_CURSOR_HEADER, router as tasks_router
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
@@ -16,8 +22,27 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+# Отмена запросов к БД при отключении клиента
+app.add_middleware(DisconnectCancelMiddleware)
+
+
+@app.exception_handler(OperationalError)
+async def operational_error_handler(request: Request, exc: OperationalError):
+    """Ответ 504 на запрос к БД, отмененный по дедлайну."""
+    if not is_query_canceled(exc):
+        raise exc
+    queries = getattr(request.state, "queries", None)
+    if queries is None or not queries.disconnected:
+        metrics.inc(QUERY_CANCELLATIONS, reason="deadline")
+    return JSONResponse(
+        status_code=504,
+        content={"detail": "Превышено время выполнения запроса"}
+    )
+
+
 # Подключение роутов
 app.include_router(
     tasks_router,
@@ -36,3 +61,9 @@ def read_root():
 def health_check():
     """Проверка приложения."""
     return {"status": "healthy"}
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    """Метрики приложения в формате Prometheus."""
+    return metrics.render()
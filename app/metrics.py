@@ -0,0 +1,44 @@
+"""Счетчики метрик приложения в текстовом формате Prometheus."""
+import threading
+from collections import Counter
+from typing import Dict, Tuple
+
+_lock = threading.Lock()
+_counters: Counter = Counter()
+_help: Dict[str, str] = {}
+
+
+def register(name: str, description: str) -> None:
+    """Зарегистрировать счетчик с описанием."""
+    _help[name] = description
+
+
+def inc(name: str, value: int = 1, **labels: str) -> None:
+    """Увеличить счетчик."""
+    key: Tuple = (name, tuple(sorted(labels.items())))
+    with _lock:
+        _counters[key] += value
+
+
+def get(name: str, **labels: str) -> int:
+    """Текущее значение счетчика."""
+    with _lock:
+        return _counters[(name, tuple(sorted(labels.items())))]
+
+
+def render() -> str:
+    """Выгрузить все счетчики в текстовом формате Prometheus."""
+    with _lock:
+        items = sorted(_counters.items())
+
+    lines = []
+    for name, description in sorted(_help.items()):
+        lines.append(f"# HELP {name} {description}")
+        lines.append(f"# TYPE {name} counter")
+        for (counter_name, labels), value in items:
+            if counter_name != name:
+                continue
+            label_str = ",".join(f'{k}="{v}"' for k, v in labels)
+            suffix = f"{{{label_str}}}" if label_str else ""
+            lines.append(f"{name}{suffix} {value}")
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,216 @@
+"""Согласование формата ответа и тела запроса: JSON или MessagePack.
+
+В MessagePack UUID передаются как bin длиной 16 байт, даты - как
+расширение timestamp (-1). Даты в БД хранятся без timezone в часовом
+поясе DB_TIMEZONE, при кодировании они переводятся в абсолютное время.
+
+Задачи из БД кодируются в MessagePack напрямую из строк ORM, без
+TaskResponse: проверка pydantic стоит дороже самого кодирования.
+"""
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, Optional
+
+import msgpack
+from fastapi import HTTPException, Request, Response
+from fastapi.routing import APIRoute
+
+from app.database import DB_TZ
+from app.tasks.models import Task
+from app.tasks.schemas import TaskResponse
+
+JSON = "application/json"
+MSGPACK = "application/msgpack"
+MSGPACK_TYPES = (MSGPACK, "application/x-msgpack")
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+NAIVE_EPOCH = datetime(1970, 1, 1)
+
+
+def _timestamp(value: datetime) -> msgpack.Timestamp:
+    """Дата как timestamp MessagePack, дата без timezone - в DB_TIMEZONE."""
+    if value.tzinfo is None:
+        delta = value - DB_TZ.utcoffset(value) - NAIVE_EPOCH
+    else:
+        delta = value - EPOCH
+    # Без перехода через float, чтобы не терять микросекунды
+    return msgpack.Timestamp(
+        seconds=delta.days * 86400 + delta.seconds,
+        nanoseconds=delta.microseconds * 1000
+    )
+
+
+def _default(value: Any) -> Any:
+    """Кодирование типов, которые msgpack не поддерживает напрямую."""
+    if isinstance(value, uuid.UUID):
+        return value.bytes
+    if isinstance(value, datetime):
+        return _timestamp(value)
+    raise TypeError(f"Неподдерживаемый тип: {type(value).__name__}")
+
+
+def packb(data: Any) -> bytes:
+    """Закодировать данные в MessagePack."""
+    return msgpack.packb(data, default=_default)
+
+
+def unpackb(body: bytes) -> Any:
+    """Декодировать MessagePack, timestamp - в datetime с timezone UTC."""
+    return msgpack.unpackb(body, timestamp=3)
+
+
+def _media_type(header: Optional[str]) -> str:
+    """Тип содержимого без параметров."""
+    return (header or "").split(";", 1)[0].strip().lower()
+
+
+def wants_msgpack(accept: Optional[str]) -> bool:
+    """Проверить, предпочитает ли клиент MessagePack по заголовку Accept.
+
+    При равном весе выбирается MessagePack, так как клиент указал его явно.
+    """
+    msgpack_q = 0.0
+    json_q = 0.0
+    for item in (accept or "").split(","):
+        media_type, *params = [part.strip() for part in item.split(";")]
+        media_type = media_type.lower()
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if media_type in MSGPACK_TYPES:
+            msgpack_q = max(msgpack_q, q)
+        elif media_type in (JSON, "application/*", "*/*"):
+            json_q = max(json_q, q)
+    return msgpack_q > 0 and msgpack_q >= json_q
+
+
+def response_format(request: Request) -> str:
+    """Формат ответа на запрос: JSON или MSGPACK."""
+    return MSGPACK if wants_msgpack(request.headers.get("accept")) else JSON
+
+
+def render(data: Any, media_type: str, status_code: int = 200) -> Response:
+    """Ответ с моделью или списком моделей в выбранном формате."""
+    return Response(
+        encode(data, media_type),
+        status_code=status_code,
+        media_type=media_type,
+        headers={"Vary": "Accept"}
+    )
+
+
+def encode(data: Any, media_type: str) -> bytes:
+    """Закодировать модель или список моделей в выбранном формате."""
+    if isinstance(data, list):
+        if media_type == MSGPACK:
+            return packb([item.model_dump() for item in data])
+        return b"[" + b",".join(
+            item.model_dump_json().encode() for item in data
+        ) + b"]"
+    if media_type == MSGPACK:
+        return packb(data.model_dump())
+    return data.model_dump_json().encode()
+
+
+def _task_fields(task: Task) -> Dict[str, Any]:
+    """Поля задачи для MessagePack в порядке полей TaskResponse."""
+    created_at = _timestamp(task.created_at)
+    updated_at = (
+        created_at if task.updated_at == task.created_at
+        else _timestamp(task.updated_at)
+    )
+    return {
+        "title": task.title,
+        "description": task.description,
+        "status": task.status,
+        "id": task.id.bytes,
+        "created_at": created_at,
+        "updated_at": updated_at,
+    }
+
+
+def encode_task(task: Task, media_type: str) -> bytes:
+    """Закодировать задачу из БД в выбранном формате."""
+    if media_type == MSGPACK:
+        return msgpack.packb(_task_fields(task))
+    return encode(TaskResponse.model_validate(task), media_type)
+
+
+def encode_tasks(tasks: Iterable[Task], media_type: str) -> bytes:
+    """Закодировать список задач из БД в выбранном формате.
+
+    JSON по-прежнему кодируется через TaskResponse сериализатором
+    pydantic на Rust.
+    """
+    if media_type == MSGPACK:
+        return msgpack.packb([_task_fields(task) for task in tasks])
+    return encode(
+        [TaskResponse.model_validate(task) for task in tasks], media_type
+    )
+
+
+class NegotiatedRoute(APIRoute):
+    """Маршрут, принимающий тело запроса в JSON или MessagePack.
+
+    Тело в MessagePack декодируется и передается FastAPI как уже
+    разобранный JSON, поэтому валидация схем не меняется.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+
+        async def route_handler(request: Request) -> Response:
+            content_type = _media_type(request.headers.get("content-type"))
+            if content_type in MSGPACK_TYPES:
+                request = await _as_json_request(request)
+            return await handler(request)
+
+        return route_handler
+
+
+async def _as_json_request(request: Request) -> Request:
+    """Запрос с декодированным телом MessagePack вместо JSON."""
+    body = await request.body()
+    headers = [
+        (name, value) for name, value in request.scope["headers"]
+        if name != b"content-type"
+    ]
+    headers.append((b"content-type", JSON.encode()))
+    scope = {**request.scope, "headers": headers}
+
+    json_request = Request(scope, request.receive)
+    json_request._body = body
+    try:
+        json_request._json = _json_safe(unpackb(body)) if body else None
+    except (ValueError, OverflowError, RecursionError):
+        raise HTTPException(
+            status_code=400, detail="Некорректное тело MessagePack"
+        )
+    return json_request
+
+
+def _json_safe(value: Any) -> Any:
+    """Привести декодированное тело MessagePack к типам JSON.
+
+    Ошибка валидации FastAPI содержит исходные значения и должна
+    кодироваться в JSON: bin длиной 16 байт считается UUID, остальные
+    bin - текстом в UTF-8, другие расширения не поддерживаются.
+    """
+    if isinstance(value, dict):
+        return {
+            _json_safe(key): _json_safe(item) for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_json_safe(item) for item in value]
+    if isinstance(value, bytes):
+        if len(value) == 16:
+            return str(uuid.UUID(bytes=value))
+        return value.decode()
+    if isinstance(value, msgpack.ExtType):
+        raise ValueError(f"Неподдерживаемое расширение: {value.code}")
+    return value
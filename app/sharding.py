@@ -0,0 +1,169 @@
+"""Шардирование задач по нескольким базам данных PostgreSQL.
+
+Задача хранится на шарде, номер которого вычисляется jump consistent
+hash от ее UUID: при добавлении шарда в конец списка на него переходит
+примерно 1/N задач, остальные остаются на месте. Если SHARD_DATABASE_URLS
+не задан, используется одна БД из get_db.
+"""
+import hashlib
+from typing import Iterator, List
+from uuid import UUID
+
+from fastapi import Depends
+from sqlalchemy.orm import Session, sessionmaker
+
+from app.config import settings
+from app.database import create_db_engine, get_db
+from app.tasks.models import Task
+
+shard_engines = [
+    create_db_engine(url) for url in settings.SHARD_DATABASE_URLS
+]
+shard_sessions = [
+    sessionmaker(autocommit=False, autoflush=False, bind=engine)
+    for engine in shard_engines
+]
+
+# Шарды прежнего размещения, которых нет в новом списке: во время
+# переноса задачи, еще не перенесенные с них, ищутся по старому адресу
+previous_shard_sessions = {
+    url: sessionmaker(
+        autocommit=False, autoflush=False, bind=create_db_engine(url)
+    )
+    for url in settings.PREVIOUS_SHARD_DATABASE_URLS
+    if url not in settings.SHARD_DATABASE_URLS
+}
+
+
+class ShardDbs(list):
+    """Сессии шардов текущего размещения.
+
+    previous - сессии шардов прежнего размещения на время переноса
+    задач, пустой список вне переноса.
+    """
+
+    def __init__(self, sessions: List[Session], previous=()):
+        super().__init__(sessions)
+        self.previous: List[Session] = list(previous)
+
+
+def jump_hash(key: int, buckets: int) -> int:
+    """Jump consistent hash (Lamping, Veach): номер корзины для ключа."""
+    bucket, jump = -1, 0
+    while jump < buckets:
+        bucket = jump
+        key = (key * 2862933555777941757 + 1) & 0xFFFFFFFFFFFFFFFF
+        jump = int((bucket + 1) * ((1 << 31) / ((key >> 33) + 1)))
+    return bucket
+
+
+def shard_index(task_id: UUID, shard_count: int) -> int:
+    """Номер шарда для задачи по хешу ее UUID."""
+    digest = hashlib.sha1(task_id.bytes).digest()
+    return jump_hash(int.from_bytes(digest[:8], "big"), shard_count)
+
+
+def shard_for(dbs: List[Session], task_id: UUID) -> Session:
+    """Сессия шарда, на котором хранится задача."""
+    return dbs[shard_index(task_id, len(dbs))]
+
+
+def shard_candidates(dbs: List[Session], task_id: UUID) -> List[Session]:
+    """Сессии шардов, на которых может лежать задача.
+
+    Сначала шард текущего размещения, во время переноса - еще шард
+    прежнего размещения, если он другой.
+    """
+    candidates = [shard_for(dbs, task_id)]
+    previous = getattr(dbs, "previous", None)
+    if previous:
+        old = shard_for(previous, task_id)
+        if old is not candidates[0]:
+            candidates.append(old)
+    return candidates
+
+
+def get_shard_dbs(db: Session = Depends(get_db)) -> Iterator[List[Session]]:
+    """Dependency для получения сессий всех шардов.
+
+    Сессии ленивые: соединение берется из пула только у шарда,
+    к которому действительно обращается запрос.
+    """
+    if not shard_sessions:
+        yield [db]
+        return
+
+    sessions = [factory() for factory in shard_sessions]
+    by_url = dict(zip(settings.SHARD_DATABASE_URLS, sessions))
+    extra = []
+    for url, factory in previous_shard_sessions.items():
+        by_url[url] = factory()
+        extra.append(by_url[url])
+    try:
+        yield ShardDbs(sessions, previous=[
+            by_url[url] for url in settings.PREVIOUS_SHARD_DATABASE_URLS
+        ])
+    finally:
+        for session in sessions + extra:
+            session.close()
+
+
+def rebalance(
+    sources: List[Session], targets: List[Session], batch_size: int = 1000
+) -> int:
+    """Перенести задачи на шарды, соответствующие их хешу.
+
+    sources - все шарды, на которых сейчас могут лежать задачи
+    (включая выводимые из эксплуатации), targets - новый список шардов.
+    Задача сначала записывается на целевой шард, затем удаляется
+    с исходного, поэтому прерванный перенос можно безопасно повторить.
+    Возвращает количество перенесенных задач.
+
+    Запись задач на время переноса нужно остановить. Строки порции
+    блокируются на исходном шарде до удаления, поэтому конкурентное
+    изменение переносимой задачи завершится ошибкой, а не потеряется.
+    Чтение во время переноса находит еще не перенесенные задачи
+    по прежнему размещению (PREVIOUS_SHARD_DATABASE_URLS).
+    """
+    target_urls = [str(target.get_bind().url) for target in targets]
+    moved = 0
+
+    for source in sources:
+        source_url = str(source.get_bind().url)
+        last_id = None
+        while True:
+            query = source.query(Task).order_by(Task.id)
+            if last_id is not None:
+                query = query.filter(Task.id > last_id)
+            batch = query.limit(batch_size).with_for_update().all()
+            if not batch:
+                break
+            last_id = batch[-1].id
+
+            by_target = {}
+            for task in batch:
+                index = shard_index(task.id, len(targets))
+                if target_urls[index] != source_url:
+                    by_target.setdefault(index, []).append(task)
+
+            # Блокировки порции держатся до удаления задач с исходного
+            # шарда, поэтому между копированием и удалением их не изменить
+            for index, tasks in by_target.items():
+                target = targets[index]
+                for task in tasks:
+                    target.merge(Task(
+                        id=task.id,
+                        title=task.title,
+                        description=task.description,
+                        status=task.status,
+                        created_at=task.created_at,
+                        updated_at=task.updated_at
+                    ))
+                target.commit()
+                for task in tasks:
+                    source.delete(task)
+                moved += len(tasks)
+            source.commit()
+            source.expunge_all()
+
+    return moved
@@ -0,0 +1,39 @@
+import os
+import time
+import uuid
+from typing import Callable, Dict
+
+from app.config import settings
+
+
+def uuid7() -> uuid.UUID:
+    """Сгенерировать UUID версии 7 (RFC 9562).
+
+    Старшие 48 бит - время в миллисекундах, поэтому новые ключи попадают
+    в правый край B-дерева первичного ключа, а не в случайный лист.
+    """
+    timestamp_ms = time.time_ns() // 1_000_000
+    rand = int.from_bytes(os.urandom(10), "big")
+
+    value = (timestamp_ms & 0xFFFF_FFFF_FFFF) << 80
+    value |= 0x7 << 76
+    value |= ((rand >> 68) & 0xFFF) << 64
+    value |= 0b10 << 62
+    value |= rand & 0x3FFF_FFFF_FFFF_FFFF
+    return uuid.UUID(int=value)
+
+
+TASK_ID_GENERATORS: Dict[str, Callable[[], uuid.UUID]] = {
+    "uuid4": uuid.uuid4,
+    "uuid7": uuid7,
+}
+
+if settings.TASK_ID_VERSION not in TASK_ID_GENERATORS:
+    raise ValueError(
+        f"Неизвестный генератор ID задач: {settings.TASK_ID_VERSION}"
+    )
+
+
+def new_task_id() -> uuid.UUID:
+    """Сгенерировать ID новой задачи выбранным в настройках генератором."""
+    return TASK_ID_GENERATORS[settings.TASK_ID_VERSION]()
@@ -1,20 +1,34 @@
-import uuid
 from datetime import datetime, timezone, timedelta
-from sqlalchemy import Column, String, DateTime, Enum
+from sqlalchemy import (
+    BigInteger, Column, String, DateTime, Enum, Index, Sequence,
+    literal_column, text
+)
 from sqlalchemy.dialects.postgresql import UUID
 
 from app.database import Base
+from app.tasks.ids import new_task_id
 from app.tasks.schemas import TaskStatus
 
 # Московский timezone (UTC+3)
 MOSCOW_TZ = timezone(timedelta(hours=3))
 
+# Монотонная последовательность изменений для дельта-синхронизации.
+# Общая для задач и tombstone-записей, чтобы токен был единым.
+task_change_seq = Sequence("task_change_seq", metadata=Base.metadata)
+
+# Номер транзакции, изменившей строку. Значение change_seq выдается
+# при выполнении INSERT/UPDATE, а не при коммите, поэтому строки
+# становятся видимыми не по порядку change_seq. Позиция изменения -
+# пара (change_xid, change_seq): строки транзакций младше xmin снимка
+# видны все, и токен можно безопасно сдвигать только по ним.
+CURRENT_XID = "pg_current_xact_id()::text::bigint"
+
 
 class Task(Base):
     """Модель задачи."""
     __tablename__ = "tasks"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    id = Column(UUID(as_uuid=True), primary_key=True, default=new_task_id)
     title = Column(String(100), nullable=False)
     description = Column(String(1000), nullable=True)
     status = Column(
@@ -33,3 +47,64 @@ class Task(Base):
         onupdate=lambda: datetime.now(MOSCOW_TZ),
         nullable=False
     )
+    change_seq = Column(
+        BigInteger,
+        task_change_seq,
+        server_default=task_change_seq.next_value(),
+        onupdate=task_change_seq.next_value(),
+        nullable=False
+    )
+    change_xid = Column(
+        BigInteger,
+        server_default=text(f"({CURRENT_XID})"),
+        onupdate=literal_column(CURRENT_XID),
+        nullable=False
+    )
+
+    __table_args__ = (
+        Index("ix_tasks_change_position", "change_xid", "change_seq"),
+        # Порядок списка задач и курсор (created_at, id)
+        Index("ix_tasks_created_at_id", created_at.desc(), id.desc()),
+        Index(
+            "ix_tasks_status_created_at_id",
+            status, created_at.desc(), id.desc()
+        ),
+    )
+
+
+class TaskTombstone(Base):
+    """Отметка об удалении задачи для дельта-синхронизации."""
+    __tablename__ = "task_tombstones"
+
+    task_id = Column(UUID(as_uuid=True), primary_key=True)
+    change_seq = Column(
+        BigInteger,
+        task_change_seq,
+        server_default=task_change_seq.next_value(),
+        nullable=False
+    )
+    change_xid = Column(
+        BigInteger,
+        server_default=text(f"({CURRENT_XID})"),
+        nullable=False
+    )
+    deleted_at = Column(
+        DateTime,
+        default=lambda: datetime.now(MOSCOW_TZ),
+        nullable=False
+    )
+
+    __table_args__ = (
+        Index(
+            "ix_task_tombstones_change_position", "change_xid", "change_seq"
+        ),
+    )
+
+
+class SyncHorizon(Base):
+    """Граница компактизации: токены ниже неё требуют полной синхронизации."""
+    __tablename__ = "sync_horizon"
+
+    name = Column(String(50), primary_key=True)
+    change_xid = Column(BigInteger, nullable=False, default=0)
+    change_seq = Column(BigInteger, nullable=False, default=0)
@@ -1,27 +1,123 @@
-from typing import List, Optional
+import time
+from typing import Callable, Hashable, List, Optional, Tuple, TypeVar
 from uuid import UUID
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import Response, StreamingResponse
 from sqlalchemy.orm import Session
 
-from app.database import get_db
-from app.tasks.schemas import TaskStatus, TaskCreate, TaskResponse, TaskUpdate
-from app.tasks.service import TaskService
+from app.coalescing import SingleFlight
+from app.config import settings
+from app.deadlines import with_deadline
+from app.negotiation import (
+    NegotiatedRoute, encode_task, encode_tasks, render, response_format
+)
+from app.sharding import shard_candidates, shard_for
+from app.tasks.ids import new_task_id
+from app.tasks.schemas import (
+    TaskStatus, TaskChangesResponse, TaskCreate, TaskResponse,
+    TaskTombstoneResponse, TaskTransition, TaskTransitionResponse, TaskUpdate
+)
+from app.tasks.service import SyncToken, TaskCursor, TaskService
 
-router = APIRouter()
+router = APIRouter(route_class=NegotiatedRoute)
+
+# Объединение одинаковых одновременных запросов на чтение.
+# Ключи: ("task", task_id, формат)
+# и ("tasks", status, skip, limit, cursor, формат).
+# Запись прекращает разделение только в текущем процессе: другие
+# процессы раздавали бы готовый ответ до записи до истечения TTL.
+if settings.COALESCE_TTL_MS > 0 and settings.WEB_CONCURRENCY > 1:
+    raise ValueError(
+        "COALESCE_TTL_MS больше 0 допустим только с одним процессом "
+        f"(WEB_CONCURRENCY={settings.WEB_CONCURRENCY})"
+    )
+task_reads = SingleFlight(ttl_ms=settings.COALESCE_TTL_MS)
+
+# Заголовок ответа со списком задач с курсором следующей страницы
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+T = TypeVar("T")
+
+
+def _read(key: Hashable, load: Callable[[], T], request: Request) -> T:
+    """Выполнить загрузку, объединяя ее с одинаковыми запросами.
+
+    Чужую загрузку запрос ждет не дольше остатка своего дедлайна.
+    """
+    if not settings.COALESCE_READS:
+        return load()
+    timeout = max(0.0, request.state.deadline - time.monotonic())
+    return task_reads.do(key, load, timeout=timeout)
+
+
+def _forget_reads(task_id: Optional[UUID] = None) -> None:
+    """Прекратить разделение чтений, затронутых записью задачи.
+
+    Списки затрагивает любая запись, задачу по ID - только ее запись.
+    Без task_id разделение прекращается для всех ключей.
+    """
+    task_reads.forget(
+        lambda key: task_id is None or key[0] == "tasks" or key[1] == task_id
+    )
 
 
 @router.post("/", response_model=TaskResponse, status_code=201)
 def create_task(
     task_data: TaskCreate,
-    db: Session = Depends(get_db)
-) -> TaskResponse:
+    request: Request,
+    dbs: List[Session] = Depends(with_deadline(settings.REQUEST_TIMEOUT_MS))
+) -> Response:
     """Создать новую задачу."""
-    task = TaskService.create_task(db, task_data)
-    return TaskResponse.model_validate(task)
+    task_id = new_task_id()
+    task = TaskService.create_task(
+        shard_for(dbs, task_id), task_data, task_id=task_id
+    )
+    _forget_reads(task_id)
+    return render(
+        TaskResponse.model_validate(task), response_format(request),
+        status_code=201
+    )
+
+
+@router.post("/transition", response_model=TaskTransitionResponse)
+def transition_tasks(
+    transition: TaskTransition,
+    request: Request,
+    dbs: List[Session] = Depends(
+        with_deadline(settings.TRANSITION_REQUEST_TIMEOUT_MS)
+    )
+):
+    """Перевести задачи, подходящие под фильтр, в новый статус.
+
+    С заголовком Accept: application/x-ndjson после каждой порции
+    возвращается строка с текущим прогрессом.
+    """
+    def progress():
+        updated = 0
+        chunks = 0
+        for db in dbs:
+            for count in TaskService.transition_tasks(
+                db, transition, chunk_size=settings.TRANSITION_CHUNK_SIZE
+            ):
+                updated += count
+                chunks += 1
+                _forget_reads()
+                yield TaskTransitionResponse(updated=updated, chunks=chunks)
+        yield TaskTransitionResponse(updated=updated, chunks=chunks)
+
+    if "application/x-ndjson" in request.headers.get("accept", ""):
+        return StreamingResponse(
+            (f"{item.model_dump_json()}\n" for item in progress()),
+            media_type="application/x-ndjson"
+        )
+
+    *_, result = progress()
+    return render(result, response_format(request))
 
 
 @router.get("/", response_model=List[TaskResponse])
 def get_tasks(
+    request: Request,
     status: Optional[TaskStatus] = Query(
         None, description="Фильтр по статусу"
     ),
@@ -31,44 +127,145 @@ def get_tasks(
     limit: int = Query(
         100, ge=1, le=1000, description="Максимальное количество записей"
     ),
-    db: Session = Depends(get_db)
-) -> List[TaskResponse]:
-    """Получить список задач с фильтрацией и пагинацией."""
-    tasks = TaskService.get_tasks(db, status=status, skip=skip, limit=limit)
-    return [TaskResponse.model_validate(task) for task in tasks]
+    cursor: Optional[str] = Query(
+        None,
+        description=f"Курсор из заголовка {NEXT_CURSOR_HEADER} "
+                    "предыдущего ответа"
+    ),
+    dbs: List[Session] = Depends(
+        with_deadline(settings.LIST_REQUEST_TIMEOUT_MS)
+    )
+) -> Response:
+    """Получить список задач с фильтрацией и пагинацией.
+
+    Если страница заполнена, курсор следующей страницы возвращается
+    в заголовке X-Next-Cursor.
+    """
+    try:
+        after = TaskCursor.parse(cursor) if cursor is not None else None
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Некорректный курсор")
+    if len(dbs) > 1 and skip > settings.SHARD_MAX_SKIP:
+        raise HTTPException(
+            status_code=400,
+            detail=f"В режиме шардирования skip не больше "
+                   f"{settings.SHARD_MAX_SKIP}, используйте cursor"
+        )
+    media_type = response_format(request)
+
+    def load() -> Tuple[bytes, Optional[str]]:
+        tasks = TaskService.get_tasks_from_shards(
+            dbs, status=status, skip=skip, limit=limit, after=after
+        )
+        next_cursor = (
+            str(TaskCursor.after(tasks[-1])) if len(tasks) == limit else None
+        )
+        body = encode_tasks(tasks, media_type)
+        return body, next_cursor
+
+    body, next_cursor = _read(
+        ("tasks", status, skip, limit, after, media_type), load, request
+    )
+    headers = {"Vary": "Accept"}
+    if next_cursor is not None:
+        headers[NEXT_CURSOR_HEADER] = next_cursor
+    return Response(body, media_type=media_type, headers=headers)
+
+
+@router.get("/changes", response_model=TaskChangesResponse)
+def get_changes(
+    request: Request,
+    since: str = Query(
+        "0", description="Токен из предыдущего ответа (0 - с начала)"
+    ),
+    limit: int = Query(
+        100, ge=1, le=1000, description="Максимальное количество изменений"
+    ),
+    dbs: List[Session] = Depends(
+        with_deadline(settings.LIST_REQUEST_TIMEOUT_MS)
+    )
+) -> Response:
+    """Получить изменения задач с момента токена."""
+    if len(dbs) > 1:
+        raise HTTPException(
+            status_code=501,
+            detail="Синхронизация изменений недоступна в режиме шардирования"
+        )
+    db = dbs[0]
+    try:
+        token = SyncToken.parse(since)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Некорректный токен")
+    if TaskService.is_token_expired(db, token):
+        raise HTTPException(
+            status_code=410,
+            detail="Токен устарел, требуется полная синхронизация"
+        )
+    changes = TaskService.get_changes(db, since=token, limit=limit)
+    response = TaskChangesResponse(
+        changed=[TaskResponse.model_validate(task) for task in changes.changed],
+        deleted=[
+            TaskTombstoneResponse.model_validate(tombstone)
+            for tombstone in changes.deleted
+        ],
+        next_token=str(changes.next_token),
+        has_more=changes.has_more
+    )
+    return render(response, response_format(request))
 
 
 @router.get("/{task_id}", response_model=TaskResponse)
 def get_task(
     task_id: UUID,
-    db: Session = Depends(get_db)
-) -> TaskResponse:
+    request: Request,
+    dbs: List[Session] = Depends(with_deadline(settings.REQUEST_TIMEOUT_MS))
+) -> Response:
     """Получить задачу по ID."""
-    task = TaskService.get_task(db, task_id)
-    if not task:
+    media_type = response_format(request)
+
+    def load() -> Optional[bytes]:
+        for db in shard_candidates(dbs, task_id):
+            task = TaskService.get_task(db, task_id)
+            if task:
+                break
+        else:
+            return None
+        return encode_task(task, media_type)
+
+    body = _read(("task", task_id, media_type), load, request)
+    if body is None:
         raise HTTPException(status_code=404, detail="Задача не найдена")
-    return TaskResponse.model_validate(task)
+    return Response(body, media_type=media_type, headers={"Vary": "Accept"})
 
 
 @router.put("/{task_id}", response_model=TaskResponse)
 def update_task(
     task_id: UUID,
     task_data: TaskUpdate,
-    db: Session = Depends(get_db)
-) -> TaskResponse:
+    request: Request,
+    dbs: List[Session] = Depends(with_deadline(settings.REQUEST_TIMEOUT_MS))
+) -> Response:
     """Обновить задачу."""
-    task = TaskService.update_task(db, task_id, task_data)
+    for db in shard_candidates(dbs, task_id):
+        task = TaskService.update_task(db, task_id, task_data)
+        if task:
+            break
+    _forget_reads(task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Задача не найдена")
-    return TaskResponse.model_validate(task)
+    return render(TaskResponse.model_validate(task), response_format(request))
 
 
 @router.delete("/{task_id}", status_code=204)
 def delete_task(
     task_id: UUID,
-    db: Session = Depends(get_db)
+    dbs: List[Session] = Depends(with_deadline(settings.REQUEST_TIMEOUT_MS))
 ) -> None:
     """Удалить задачу."""
-    success = TaskService.delete_task(db, task_id)
+    success = any(
+        TaskService.delete_task(db, task_id)
+        for db in shard_candidates(dbs, task_id)
+    )
+    _forget_reads(task_id)
     if not success:
         raise HTTPException(status_code=404, detail="Задача не найдена")
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 from uuid import UUID
 from pydantic import BaseModel, Field, field_validator
 
@@ -60,3 +60,52 @@ class TaskResponse(TaskBase):
     model_config = {
         "from_attributes": True
     }
+
+
+class TaskTombstoneResponse(BaseModel):
+    """Схема для отметки об удалении задачи."""
+    id: UUID = Field(
+        validation_alias="task_id", description="UUID удаленной задачи"
+    )
+    deleted_at: datetime = Field(description="Дата удаления")
+
+    model_config = {
+        "from_attributes": True
+    }
+
+
+class TaskChangesResponse(BaseModel):
+    """Схема для ответа с изменениями задач с момента токена."""
+    changed: List[TaskResponse] = Field(
+        description="Созданные или обновленные задачи"
+    )
+    deleted: List[TaskTombstoneResponse] = Field(
+        description="Удаленные задачи"
+    )
+    next_token: str = Field(
+        description="Токен для следующего запроса изменений"
+    )
+    has_more: bool = Field(
+        description="Есть ли еще изменения после next_token"
+    )
+
+
+class TaskTransition(BaseModel):
+    """Схема для массового перевода задач в другой статус."""
+    from_status: TaskStatus = Field(description="Текущий статус задач")
+    to_status: TaskStatus = Field(description="Новый статус задач")
+    created_after: Optional[datetime] = Field(
+        None, description="Задачи, созданные не раньше этой даты"
+    )
+    created_before: Optional[datetime] = Field(
+        None, description="Задачи, созданные раньше этой даты"
+    )
+    ids: Optional[List[UUID]] = Field(
+        None, max_length=10000, description="Ограничить задачами из списка"
+    )
+
+
+class TaskTransitionResponse(BaseModel):
+    """Схема для ответа с результатом массового перевода задач."""
+    updated: int = Field(description="Количество обновленных задач")
+    chunks: int = Field(description="Количество выполненных порций")
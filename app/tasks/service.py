@@ -1,19 +1,92 @@
-from typing import List, Optional
+import heapq
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Iterator, List, NamedTuple, Optional
 from uuid import UUID
 from sqlalchemy.orm import Session
-from sqlalchemy import desc
+from sqlalchemy import desc, select, text, tuple_, update
 
-from app.tasks.models import Task
-from app.tasks.schemas import TaskStatus, TaskCreate, TaskUpdate
+from app.tasks.models import SyncHorizon, Task, TaskTombstone
+from app.tasks.schemas import (
+    TaskStatus, TaskCreate, TaskTransition, TaskUpdate
+)
+
+# Имя границы компактизации tombstone-записей задач
+TASKS_HORIZON = "tasks"
+
+# Начало отсчета для курсора списка (created_at хранится без timezone)
+CURSOR_EPOCH = datetime(1970, 1, 1)
+
+
+class SyncToken(NamedTuple):
+    """Позиция в журнале изменений: номер транзакции и change_seq.
+
+    В текстовом виде - "<xid>.<seq>", "0" означает начало журнала.
+    """
+    xid: int
+    seq: int
+
+    @classmethod
+    def parse(cls, token: str) -> "SyncToken":
+        """Разобрать токен из запроса, ValueError при неверном формате."""
+        if token == "0":
+            return cls(0, 0)
+        xid, sep, seq = token.partition(".")
+        if not (sep and xid.isdigit() and seq.isdigit()):
+            raise ValueError(f"Некорректный токен: {token!r}")
+        return cls(int(xid), int(seq))
+
+    def __str__(self) -> str:
+        return f"{self.xid}.{self.seq}"
+
+
+class TaskCursor(NamedTuple):
+    """Позиция в списке задач: created_at и id последней задачи страницы.
+
+    В текстовом виде - "<микросекунды от эпохи>.<id в hex>".
+    """
+    created_at: datetime
+    id: UUID
+
+    @classmethod
+    def parse(cls, cursor: str) -> "TaskCursor":
+        """Разобрать курсор из запроса, ValueError при неверном формате."""
+        micros, sep, task_id = cursor.partition(".")
+        if not (sep and micros.isdigit()):
+            raise ValueError(f"Некорректный курсор: {cursor!r}")
+        return cls(
+            CURSOR_EPOCH + timedelta(microseconds=int(micros)),
+            UUID(hex=task_id)
+        )
+
+    @classmethod
+    def after(cls, task: Task) -> "TaskCursor":
+        """Курсор, указывающий на задачу."""
+        return cls(task.created_at, task.id)
+
+    def __str__(self) -> str:
+        micros = (self.created_at - CURSOR_EPOCH) // timedelta(microseconds=1)
+        return f"{micros}.{self.id.hex}"
+
+
+class TaskChanges(NamedTuple):
+    """Порция изменений задач для дельта-синхронизации."""
+    changed: List[Task]
+    deleted: List[TaskTombstone]
+    next_token: SyncToken
+    has_more: bool
 
 
 class TaskService:
     """Сервис для работы с задачами."""
 
     @staticmethod
-    def create_task(db: Session, task_data: TaskCreate) -> Task:
+    def create_task(
+        db: Session, task_data: TaskCreate, task_id: Optional[UUID] = None
+    ) -> Task:
         """Создать новую задачу."""
         task = Task(
+            id=task_id,
             title=task_data.title,
             description=task_data.description,
             status=task_data.status
@@ -33,17 +106,63 @@ class TaskService:
         db: Session,
         status: Optional[TaskStatus] = None,
         skip: int = 0,
-        limit: int = 100
+        limit: int = 100,
+        after: Optional[TaskCursor] = None
     ) -> List[Task]:
-        """Получить список задач с фильтрацией и пагинацией."""
+        """Получить список задач с фильтрацией и пагинацией.
+
+        Задачи упорядочены по (created_at, id) от новых к старым,
+        after - курсор последней задачи предыдущей страницы. Порядок
+        и курсор обслуживают индексы ix_tasks_created_at_id и
+        ix_tasks_status_created_at_id.
+        """
         query = db.query(Task)
 
         if status:
             query = query.filter(Task.status == status)
+        if after is not None:
+            query = query.filter(
+                tuple_(Task.created_at, Task.id) < tuple_(*after)
+            )
 
-        return query.order_by(desc(Task.created_at)).offset(skip).limit(
-            limit
-        ).all()
+        return query.order_by(
+            desc(Task.created_at), desc(Task.id)
+        ).offset(skip).limit(limit).all()
+
+    @staticmethod
+    def get_tasks_from_shards(
+        dbs: List[Session],
+        status: Optional[TaskStatus] = None,
+        skip: int = 0,
+        limit: int = 100,
+        after: Optional[TaskCursor] = None
+    ) -> List[Task]:
+        """Получить список задач со всех шардов.
+
+        Каждый шард сам применяет курсор и возвращает первые
+        skip + limit задач после него, шарды опрашиваются параллельно,
+        результаты сливаются по (created_at, id). Для глубокой пагинации
+        нужен курсор: с ним каждый шард читает по индексу на (created_at,
+        id) не больше limit строк.
+        """
+        if len(dbs) == 1:
+            return TaskService.get_tasks(
+                dbs[0], status=status, skip=skip, limit=limit, after=after
+            )
+
+        with ThreadPoolExecutor(max_workers=len(dbs)) as executor:
+            results = list(executor.map(
+                lambda db: TaskService.get_tasks(
+                    db, status=status, skip=0, limit=skip + limit, after=after
+                ),
+                dbs
+            ))
+
+        merged = heapq.merge(
+            *results, key=lambda task: (task.created_at, task.id),
+            reverse=True
+        )
+        return list(merged)[skip:skip + limit]
 
     @staticmethod
     def update_task(
@@ -62,6 +181,55 @@ class TaskService:
         db.refresh(task)
         return task
 
+    @staticmethod
+    def transition_tasks(
+        db: Session, transition: TaskTransition, chunk_size: int = 1000
+    ) -> Iterator[int]:
+        """Перевести задачи, подходящие под фильтр, в новый статус.
+
+        Обновление выполняется порциями по chunk_size строк, каждая
+        в своей транзакции, чтобы не удерживать блокировки надолго.
+        Порции идут по первичному ключу: следующая начинается после
+        наибольшего id предыдущей, поэтому уже пройденные строки
+        не читаются повторно. Возвращает количество обновленных строк
+        в каждой порции.
+        """
+        if transition.from_status == transition.to_status:
+            return
+
+        conditions = [Task.status == transition.from_status]
+        if transition.created_after is not None:
+            conditions.append(
+                Task.created_at >= transition.created_after
+            )
+        if transition.created_before is not None:
+            conditions.append(
+                Task.created_at < transition.created_before
+            )
+        if transition.ids is not None:
+            conditions.append(Task.id.in_(transition.ids))
+
+        last_id = None
+        while True:
+            chunk_conditions = list(conditions)
+            if last_id is not None:
+                chunk_conditions.append(Task.id > last_id)
+            chunk = select(Task.id).where(*chunk_conditions).order_by(
+                Task.id
+            ).limit(chunk_size).with_for_update()
+            statement = update(Task).where(Task.id.in_(chunk)).values(
+                status=transition.to_status
+            ).returning(Task.id).execution_options(
+                synchronize_session=False
+            )
+
+            updated_ids = db.execute(statement).scalars().all()
+            db.commit()
+            if not updated_ids:
+                return
+            last_id = max(updated_ids)
+            yield len(updated_ids)
+
     @staticmethod
     def delete_task(db: Session, task_id: UUID) -> bool:
         """Удалить задачу."""
@@ -70,5 +238,93 @@ class TaskService:
             return False
 
         db.delete(task)
+        db.add(TaskTombstone(task_id=task.id))
         db.commit()
         return True
+
+    @staticmethod
+    def is_token_expired(db: Session, since: SyncToken) -> bool:
+        """Проверить, удалены ли компактизацией tombstone-записи после токена."""
+        if since == SyncToken(0, 0):
+            return False
+        horizon = db.get(SyncHorizon, TASKS_HORIZON)
+        return horizon is not None and since < SyncToken(
+            horizon.change_xid, horizon.change_seq
+        )
+
+    @staticmethod
+    def get_changes(
+        db: Session, since: SyncToken, limit: int = 100
+    ) -> TaskChanges:
+        """Получить задачи и tombstone-записи, измененные после токена.
+
+        Возвращаются только изменения транзакций младше xmin снимка:
+        все такие транзакции завершены, и после токена не появится
+        строк с меньшей позицией. Изменения еще открытых транзакций и
+        закоммиченные после них придут в следующем запросе. Оба запроса
+        идут по индексу (change_xid, change_seq), поэтому стоимость
+        пропорциональна числу изменений, а не размеру таблицы.
+        """
+        xmin = db.execute(text(
+            "SELECT pg_snapshot_xmin(pg_current_snapshot())::text::bigint"
+        )).scalar()
+
+        def query(model):
+            return db.query(model).filter(
+                tuple_(model.change_xid, model.change_seq) > tuple_(*since),
+                model.change_xid < xmin
+            ).order_by(model.change_xid, model.change_seq).limit(limit + 1)
+
+        merged = sorted(
+            query(Task).all() + query(TaskTombstone).all(),
+            key=lambda row: (row.change_xid, row.change_seq)
+        )
+        page = merged[:limit]
+        has_more = len(merged) > limit
+        if has_more:
+            next_token = SyncToken(page[-1].change_xid, page[-1].change_seq)
+        else:
+            next_token = max(since, SyncToken(xmin, 0))
+
+        return TaskChanges(
+            changed=[row for row in page if isinstance(row, Task)],
+            deleted=[row for row in page if isinstance(row, TaskTombstone)],
+            next_token=next_token,
+            has_more=has_more
+        )
+
+    @staticmethod
+    def compact_tombstones(db: Session, older_than: datetime) -> int:
+        """Удалить tombstone-записи старше указанной даты.
+
+        Граница компактизации сдвигается на позицию последней удаленной
+        записи: клиенты с более старым токеном должны выполнить полную
+        синхронизацию.
+        """
+        last = db.query(TaskTombstone).filter(
+            TaskTombstone.deleted_at < older_than
+        ).order_by(
+            desc(TaskTombstone.change_xid), desc(TaskTombstone.change_seq)
+        ).first()
+        if last is None:
+            return 0
+        position = SyncToken(last.change_xid, last.change_seq)
+
+        deleted = db.query(TaskTombstone).filter(
+            tuple_(TaskTombstone.change_xid, TaskTombstone.change_seq)
+            <= tuple_(*position)
+        ).delete(synchronize_session=False)
+
+        horizon = db.get(SyncHorizon, TASKS_HORIZON)
+        if horizon is None:
+            db.add(SyncHorizon(
+                name=TASKS_HORIZON,
+                change_xid=position.xid,
+                change_seq=position.seq
+            ))
+        elif SyncToken(horizon.change_xid, horizon.change_seq) < position:
+            horizon.change_xid, horizon.change_seq = position
+
+        db.commit()
+        return deleted
+
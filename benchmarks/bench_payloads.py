@@ -0,0 +1,104 @@
+"""Бенчмарк ответов со списком задач: JSON против MessagePack.
+
+Для списков разного размера сравниваются размер тела ответа, время
+кодирования на сервере из строк ORM (как в GET /api/v1/tasks/) и время
+декодирования на клиенте: сырое (json.loads / msgpack.unpackb) и с
+разбором в TaskResponse.
+
+Запуск:
+    python -m benchmarks.bench_payloads --sizes 1 100 1000
+    python -m benchmarks.bench_payloads --sizes 1 100 1000 --no-description
+"""
+import argparse
+import json
+import time
+import uuid
+from datetime import datetime
+from typing import Callable, List
+
+from pydantic import TypeAdapter
+
+from app.database import DB_TZ
+from app.negotiation import JSON, MSGPACK, encode_tasks, unpackb
+from app.tasks.models import Task
+from app.tasks.schemas import TaskResponse, TaskStatus
+
+DESCRIPTION = ("Описание задачи на русском языке. " * 40)[:1000]
+
+response_list_adapter = TypeAdapter(List[TaskResponse])
+
+
+def _tasks(size: int, description: str) -> List[Task]:
+    """Transient-объекты Task с датами без timezone, как из БД."""
+    now = datetime.now(DB_TZ).replace(tzinfo=None)
+    return [
+        Task(
+            id=uuid.uuid4(),
+            title=f"Задача {i}",
+            description=description,
+            status=TaskStatus.IN_PROGRESS.value,
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(size)
+    ]
+
+
+def _best_us(func: Callable[[], object], repeat: int) -> float:
+    """Минимальное по повторам время вызова в микросекундах."""
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - started)
+    return best * 1_000_000
+
+
+def main() -> None:
+    """Точка входа бенчмарка."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1, 100, 1000])
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument(
+        "--no-description", action="store_true",
+        help="Задачи без описания (вес UUID и дат в ответе выше)"
+    )
+    args = parser.parse_args()
+    description = None if args.no_description else DESCRIPTION
+
+    print(
+        f"{'задач':>6} {'формат':<8} {'байт':>10} {'кодир., мкс':>12} "
+        f"{'декод., мкс':>12} {'в модели, мкс':>14}"
+    )
+    for size in args.sizes:
+        tasks = _tasks(size, description)
+        json_body = encode_tasks(tasks, JSON)
+        msgpack_body = encode_tasks(tasks, MSGPACK)
+
+        rows = [
+            (
+                "json", json_body,
+                lambda: encode_tasks(tasks, JSON),
+                lambda: json.loads(json_body),
+                lambda: response_list_adapter.validate_json(json_body),
+            ),
+            (
+                "msgpack", msgpack_body,
+                lambda: encode_tasks(tasks, MSGPACK),
+                lambda: unpackb(msgpack_body),
+                lambda: response_list_adapter.validate_python(
+                    unpackb(msgpack_body)
+                ),
+            ),
+        ]
+        for name, body, encode_func, decode_func, parse_func in rows:
+            print(
+                f"{size:>6} {name:<8} {len(body):>10,} "
+                f"{_best_us(encode_func, args.repeat):>12,.0f} "
+                f"{_best_us(decode_func, args.repeat):>12,.0f} "
+                f"{_best_us(parse_func, args.repeat):>14,.0f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,271 @@
+"""Микро-бенчмарк валидации и сериализации схем задач.
+
+Сравнивает текущий путь (TaskCreate(**data), TaskResponse.model_validate
+из ORM-объекта) с model_validate_json, TypeAdapter для списков и
+model_construct для доверенных данных. Результат - стоимость одного
+объекта в наносекундах для списков от 1 до 10 000 элементов.
+
+Сохранение результата для текущего коммита:
+    python -m benchmarks.bench_schemas --save
+
+Проверка регрессии относительно последнего сохраненного результата
+(код возврата 1, если стоимость выросла больше чем на --max-regression %):
+    python -m benchmarks.bench_schemas --compare latest --max-regression 15
+
+Каталог результатов не хранится в git: в CI его нужно восстановить из
+артефакта сборки основной ветки (--output-dir). Если базового результата
+нет, проверка завершается с кодом 2; --allow-missing-baseline разрешает
+пропустить сравнение, например при первом запуске.
+"""
+import argparse
+import json
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime
+from pathlib import Path
+from typing import Callable, Dict, List, Optional
+
+from pydantic import TypeAdapter
+
+from app.tasks.models import MOSCOW_TZ, Task
+from app.tasks.schemas import TaskCreate, TaskResponse, TaskStatus, TaskUpdate
+
+SIZES = [1, 100, 1000, 10000]
+DEFAULT_OUTPUT_DIR = Path(".benchmarks")
+
+TITLE = "  Подготовить квартальный отчет по задачам отдела  "
+DESCRIPTION = ("Описание задачи на русском языке. " * 40)[:1000]
+
+create_list_adapter = TypeAdapter(List[TaskCreate])
+response_list_adapter = TypeAdapter(List[TaskResponse])
+
+
+def _create_payloads(size: int) -> List[dict]:
+    """Тела запросов на создание задачи."""
+    return [
+        {
+            "title": f"{TITLE}{i}",
+            "description": DESCRIPTION,
+            "status": TaskStatus.IN_PROGRESS.value,
+        }
+        for i in range(size)
+    ]
+
+
+def _orm_rows(size: int) -> List[Task]:
+    """Transient-объекты Task без сессии.
+
+    Атрибуты читаются через инструментацию SQLAlchemy, как у задач,
+    загруженных из БД, поэтому from_attributes измеряется полностью.
+    """
+    now = datetime.now(MOSCOW_TZ).replace(tzinfo=None)
+    return [
+        Task(
+            id=uuid.uuid4(),
+            title=f"Задача {i}",
+            description=DESCRIPTION,
+            status=TaskStatus.IN_PROGRESS.value,
+            created_at=now,
+            updated_at=now,
+        )
+        for i in range(size)
+    ]
+
+
+def build_cases(size: int) -> Dict[str, Callable[[], object]]:
+    """Сценарии бенчмарка для списка из size объектов."""
+    payloads = _create_payloads(size)
+    payloads_json = [json.dumps(p, ensure_ascii=False) for p in payloads]
+    list_json = json.dumps(payloads, ensure_ascii=False)
+    updates = [{"title": p["title"], "status": p["status"]} for p in payloads]
+    rows = _orm_rows(size)
+    responses = [TaskResponse.model_validate(row) for row in rows]
+
+    return {
+        "create.init": lambda: [TaskCreate(**p) for p in payloads],
+        "create.model_validate_json": lambda: [
+            TaskCreate.model_validate_json(p) for p in payloads_json
+        ],
+        "create.type_adapter_json": lambda: (
+            create_list_adapter.validate_json(list_json)
+        ),
+        "create.model_construct": lambda: [
+            TaskCreate.model_construct(**p) for p in payloads
+        ],
+        "update.init": lambda: [TaskUpdate(**u) for u in updates],
+        "update.model_construct": lambda: [
+            TaskUpdate.model_construct(**u) for u in updates
+        ],
+        "response.model_validate": lambda: [
+            TaskResponse.model_validate(row) for row in rows
+        ],
+        "response.type_adapter": lambda: response_list_adapter.validate_python(
+            rows, from_attributes=True
+        ),
+        "response.model_construct": lambda: [
+            TaskResponse.model_construct(
+                id=row.id,
+                title=row.title,
+                description=row.description,
+                status=row.status,
+                created_at=row.created_at,
+                updated_at=row.updated_at
+            )
+            for row in rows
+        ],
+        "response.dump_json": lambda: [r.model_dump_json() for r in responses],
+        "response.type_adapter_dump_json": lambda: (
+            response_list_adapter.dump_json(responses)
+        ),
+    }
+
+
+def measure(
+    func: Callable[[], object], size: int, min_time: float, repeat: int
+) -> float:
+    """Минимальная по повторам стоимость одного объекта в наносекундах."""
+    loops = 1
+    while True:
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        if time.perf_counter() - started >= min_time:
+            break
+        loops *= 2
+
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter_ns()
+        for _ in range(loops):
+            func()
+        best = min(best, (time.perf_counter_ns() - started) / loops)
+    return best / size
+
+
+def run(
+    sizes: List[int], min_time: float = 0.05, repeat: int = 5
+) -> Dict[str, float]:
+    """Выполнить все сценарии, вернуть стоимость объекта по ключу сценария."""
+    results = {}
+    for size in sizes:
+        for name, func in build_cases(size).items():
+            results[f"{name}[{size}]"] = measure(func, size, min_time, repeat)
+    return results
+
+
+def compare(
+    baseline: Dict[str, float],
+    current: Dict[str, float],
+    max_regression: float
+) -> List[str]:
+    """Сценарии, стоимость которых выросла больше чем на max_regression %."""
+    regressions = []
+    for key, value in sorted(current.items()):
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        change = (value - previous) / previous * 100
+        if change > max_regression:
+            regressions.append(
+                f"{key}: {previous:,.0f} -> {value:,.0f} нс/объект "
+                f"(+{change:.1f}%)"
+            )
+    return regressions
+
+
+def _current_commit() -> str:
+    """Короткий хеш текущего коммита."""
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], text=True
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _load_baseline(output_dir: Path, name: str, commit: str) -> Optional[dict]:
+    """Загрузить базовый результат: путь, хеш коммита или latest.
+
+    Возвращает None, если результат не найден.
+    """
+    if name == "latest":
+        candidates = sorted(
+            (p for p in output_dir.glob("*.json") if p.stem != commit),
+            key=lambda p: p.stat().st_mtime
+        )
+        if not candidates:
+            return None
+        path = candidates[-1]
+    else:
+        path = Path(name)
+        if not path.is_file():
+            path = output_dir / f"{name}.json"
+        if not path.is_file():
+            return None
+    return json.loads(path.read_text())
+
+
+def main() -> None:
+    """Точка входа бенчмарка."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=SIZES)
+    parser.add_argument("--min-time", type=float, default=0.05)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output-dir", type=Path, default=DEFAULT_OUTPUT_DIR)
+    parser.add_argument(
+        "--save", action="store_true",
+        help="Сохранить результат как базовый для текущего коммита"
+    )
+    parser.add_argument(
+        "--compare", metavar="BASELINE",
+        help="Путь, хеш коммита или latest для сравнения"
+    )
+    parser.add_argument(
+        "--max-regression", type=float, default=15.0,
+        help="Допустимый рост стоимости объекта, %%"
+    )
+    parser.add_argument(
+        "--allow-missing-baseline", action="store_true",
+        help="Пропустить сравнение, если базовый результат не найден"
+    )
+    args = parser.parse_args()
+
+    commit = _current_commit()
+    results = run(args.sizes, args.min_time, args.repeat)
+    for key, value in results.items():
+        print(f"{key:<45} {value:>12,.0f} нс/объект")
+
+    if args.save:
+        args.output_dir.mkdir(parents=True, exist_ok=True)
+        path = args.output_dir / f"{commit}.json"
+        path.write_text(json.dumps(
+            {"commit": commit, "results": results}, indent=2
+        ))
+        print(f"\nРезультат сохранен в {path}")
+
+    if args.compare:
+        baseline = _load_baseline(args.output_dir, args.compare, commit)
+        if baseline is None:
+            message = (
+                f"Базовый результат {args.compare!r} не найден "
+                f"в {args.output_dir}"
+            )
+            if args.allow_missing_baseline:
+                print(f"\n{message}, сравнение пропущено")
+                return
+            print(f"\n{message}", file=sys.stderr)
+            sys.exit(2)
+        regressions = compare(
+            baseline["results"], results, args.max_regression
+        )
+        print(f"\nСравнение с {baseline['commit']}:")
+        if regressions:
+            print("\n".join(regressions))
+            sys.exit(1)
+        print("регрессий нет")
+
+
+if __name__ == "__main__":
+    main()
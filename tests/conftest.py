@@ -1,11 +1,10 @@
 """Общие фикстуры для тестов."""
 import pytest
 from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.main import app
-from app.database import get_db, Base
+from app.database import create_db_engine, get_db, Base
 
 
 @pytest.fixture
@@ -17,7 +16,7 @@ def db_engine():
     )
 
     # Создаем движок
-    engine = create_engine(database_url)
+    engine = create_db_engine(database_url)
 
     # Создаем все таблицы
     Base.metadata.create_all(bind=engine)
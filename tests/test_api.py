@@ -1,7 +1,19 @@
 """Тесты для API эндпоинтов."""
+import json
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
+
+import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session, sessionmaker
 
+from app.config import settings
+from app.negotiation import packb, unpackb
+from app.tasks.models import SyncHorizon, Task, TaskTombstone
 from app.tasks.schemas import TaskStatus
+from app.tasks.service import (
+    TASKS_HORIZON, SyncToken, TaskCursor, TaskService
+)
 
 # Константа для несуществующего UUID
 NONEXISTENT_UUID = "00000000-0000-0000-0000-000000000000"
@@ -202,3 +214,376 @@ class TestTasksAPI:
         task_data = {"title": "Задача", "status": "неверный_статус"}
         response = client.post("/api/v1/tasks/", json=task_data)
         assert response.status_code == 422
+
+
+class TestTaskChangesAPI:
+    """Тесты для дельта-синхронизации задач."""
+
+    @staticmethod
+    def _latest_token(client: TestClient) -> str:
+        """Получить актуальный токен, пролистав все изменения."""
+        token = "0"
+        while True:
+            data = client.get(
+                f"/api/v1/tasks/changes?since={token}&limit=1000"
+            ).json()
+            token = data["next_token"]
+            if not data["has_more"]:
+                return token
+
+    def test_changes_created_updated_deleted(self, client: TestClient):
+        """Тест получения созданных, обновленных и удаленных задач."""
+        token = self._latest_token(client)
+
+        created = client.post(
+            "/api/v1/tasks/", json={"title": "Новая задача"}
+        ).json()
+        updated = client.post(
+            "/api/v1/tasks/", json={"title": "Задача для обновления"}
+        ).json()
+        deleted = client.post(
+            "/api/v1/tasks/", json={"title": "Задача для удаления"}
+        ).json()
+        client.put(
+            f"/api/v1/tasks/{updated['id']}",
+            json={"status": TaskStatus.COMPLETED.value}
+        )
+        client.delete(f"/api/v1/tasks/{deleted['id']}")
+
+        response = client.get(f"/api/v1/tasks/changes?since={token}")
+
+        assert response.status_code == 200
+        data = response.json()
+        changed = {task["id"]: task for task in data["changed"]}
+        assert set(changed) == {created["id"], updated["id"]}
+        assert changed[updated["id"]]["status"] == TaskStatus.COMPLETED.value
+        assert [t["id"] for t in data["deleted"]] == [deleted["id"]]
+        assert SyncToken.parse(data["next_token"]) > SyncToken.parse(token)
+        assert data["has_more"] is False
+
+    def test_changes_empty_since_latest(self, client: TestClient):
+        """Тест отсутствия изменений после актуального токена."""
+        client.post("/api/v1/tasks/", json={"title": "Задача"})
+        token = self._latest_token(client)
+
+        response = client.get(f"/api/v1/tasks/changes?since={token}")
+
+        assert response.status_code == 200
+        data = response.json()
+        assert data["changed"] == []
+        assert data["deleted"] == []
+        assert data["next_token"] == token
+
+    def test_changes_pagination(self, client: TestClient):
+        """Тест постраничного получения изменений."""
+        token = self._latest_token(client)
+        for i in range(3):
+            client.post("/api/v1/tasks/", json={"title": f"Задача {i+1}"})
+
+        first = client.get(
+            f"/api/v1/tasks/changes?since={token}&limit=2"
+        ).json()
+        second = client.get(
+            f"/api/v1/tasks/changes?since={first['next_token']}&limit=2"
+        ).json()
+
+        assert len(first["changed"]) == 2
+        assert first["has_more"] is True
+        assert len(second["changed"]) == 1
+        assert second["has_more"] is False
+
+    def test_changes_wait_for_open_transaction(
+        self, client: TestClient, db_engine
+    ):
+        """Тест: изменение открытой транзакции не пропускается токеном.
+
+        Задача в открытой транзакции получает change_seq раньше задачи,
+        созданной и закоммиченной после нее. Токен не должен сдвинуться
+        за обе задачи, пока первая транзакция не завершится.
+        """
+        token = self._latest_token(client)
+        other = sessionmaker(bind=db_engine)()
+        try:
+            pending = Task(title="Задача в открытой транзакции")
+            other.add(pending)
+            other.flush()
+            pending_id = str(pending.id)
+            created = client.post(
+                "/api/v1/tasks/", json={"title": "Задача после нее"}
+            ).json()
+
+            first = client.get(f"/api/v1/tasks/changes?since={token}").json()
+            first_ids = {task["id"] for task in first["changed"]}
+            assert pending_id not in first_ids
+            assert created["id"] not in first_ids
+
+            other.commit()
+        finally:
+            other.close()
+
+        second = client.get(
+            f"/api/v1/tasks/changes?since={first['next_token']}"
+        ).json()
+        second_ids = {task["id"] for task in second["changed"]}
+        assert {pending_id, created["id"]} <= second_ids
+
+    def test_changes_invalid_token(self, client: TestClient):
+        """Тест ответа на некорректный токен."""
+        response = client.get("/api/v1/tasks/changes?since=abc")
+        assert response.status_code == 400
+
+    def test_compact_tombstones(self, client: TestClient, db_session: Session):
+        """Тест удаления старых tombstone-записей и сдвига границы."""
+        task = client.post("/api/v1/tasks/", json={"title": "Задача"}).json()
+        client.delete(f"/api/v1/tasks/{task['id']}")
+
+        assert TaskService.compact_tombstones(
+            db_session, datetime(2000, 1, 1)
+        ) == 0
+        deleted = TaskService.compact_tombstones(
+            db_session, datetime.now() + timedelta(days=1)
+        )
+
+        assert deleted >= 1
+        assert db_session.get(TaskTombstone, UUID(task["id"])) is None
+        horizon = db_session.get(SyncHorizon, TASKS_HORIZON)
+        assert SyncToken(horizon.change_xid, horizon.change_seq) > (0, 0)
+
+    def test_expired_token_requires_full_sync(
+        self, client: TestClient, db_session: Session
+    ):
+        """Тест ответа 410 на токен старше границы компактизации."""
+        token = self._latest_token(client)
+        task = client.post("/api/v1/tasks/", json={"title": "Задача"}).json()
+        client.delete(f"/api/v1/tasks/{task['id']}")
+        TaskService.compact_tombstones(
+            db_session, datetime.now() + timedelta(days=1)
+        )
+
+        response = client.get(f"/api/v1/tasks/changes?since={token}")
+        assert response.status_code == 410
+
+        response = client.get("/api/v1/tasks/changes?since=0")
+        assert response.status_code == 200
+
+
+class TestTaskCursor:
+    """Тесты для курсора списка задач."""
+
+    def test_round_trip(self):
+        """Тест разбора курсора из текстового вида."""
+        cursor = TaskCursor(
+            datetime(2026, 10, 19, 12, 30, 15, 123456), UUID(NONEXISTENT_UUID)
+        )
+        assert TaskCursor.parse(str(cursor)) == cursor
+
+    @pytest.mark.parametrize("cursor", ["", "1", "a.b", "1.xyz", "-1.0"])
+    def test_invalid_cursor(self, cursor: str):
+        """Тест ошибки при некорректном курсоре."""
+        with pytest.raises(ValueError):
+            TaskCursor.parse(cursor)
+
+
+class TestSyncToken:
+    """Тесты для токена дельта-синхронизации."""
+
+    def test_round_trip(self):
+        """Тест разбора токена из текстового вида."""
+        token = SyncToken(1042, 77)
+        assert SyncToken.parse(str(token)) == token
+
+    def test_initial_token(self):
+        """Тест токена начала журнала."""
+        assert SyncToken.parse("0") == SyncToken(0, 0)
+
+    @pytest.mark.parametrize("token", ["", "1", "1.", ".1", "-1.2", "a.b"])
+    def test_invalid_token(self, token: str):
+        """Тест ошибки при некорректном токене."""
+        with pytest.raises(ValueError):
+            SyncToken.parse(token)
+
+
+class TestTaskTransitionAPI:
+    """Тесты для массового перевода задач в другой статус."""
+
+    @staticmethod
+    def _create_tasks(client: TestClient, count: int, status: TaskStatus):
+        """Создать задачи и вернуть их ID."""
+        return [
+            client.post(
+                "/api/v1/tasks/",
+                json={"title": f"Задача {i+1}", "status": status.value}
+            ).json()["id"]
+            for i in range(count)
+        ]
+
+    def test_transition(self, client: TestClient):
+        """Тест перевода задач по статусу и списку ID."""
+        ids = self._create_tasks(client, 3, TaskStatus.IN_PROGRESS)
+        other_id = self._create_tasks(client, 1, TaskStatus.CREATED)[0]
+
+        response = client.post("/api/v1/tasks/transition", json={
+            "from_status": TaskStatus.IN_PROGRESS.value,
+            "to_status": TaskStatus.COMPLETED.value,
+            "ids": ids + [other_id]
+        })
+
+        assert response.status_code == 200
+        assert response.json()["updated"] == 3
+        for task_id in ids:
+            task = client.get(f"/api/v1/tasks/{task_id}").json()
+            assert task["status"] == TaskStatus.COMPLETED.value
+        other = client.get(f"/api/v1/tasks/{other_id}").json()
+        assert other["status"] == TaskStatus.CREATED.value
+
+    def test_transition_chunks(self, client: TestClient, monkeypatch):
+        """Тест обновления порциями."""
+        monkeypatch.setattr(settings, "TRANSITION_CHUNK_SIZE", 2)
+        ids = self._create_tasks(client, 5, TaskStatus.CREATED)
+
+        response = client.post("/api/v1/tasks/transition", json={
+            "from_status": TaskStatus.CREATED.value,
+            "to_status": TaskStatus.IN_PROGRESS.value,
+            "ids": ids
+        })
+
+        assert response.json() == {"updated": 5, "chunks": 3}
+
+    def test_transition_progress(self, client: TestClient, monkeypatch):
+        """Тест потоковой передачи прогресса."""
+        monkeypatch.setattr(settings, "TRANSITION_CHUNK_SIZE", 2)
+        ids = self._create_tasks(client, 3, TaskStatus.CREATED)
+
+        response = client.post(
+            "/api/v1/tasks/transition",
+            json={
+                "from_status": TaskStatus.CREATED.value,
+                "to_status": TaskStatus.COMPLETED.value,
+                "ids": ids
+            },
+            headers={"Accept": "application/x-ndjson"}
+        )
+
+        lines = [json.loads(line) for line in response.text.splitlines()]
+        assert [line["updated"] for line in lines] == [2, 3, 3]
+
+    def test_transition_created_range(self, client: TestClient):
+        """Тест фильтрации по дате создания."""
+        ids = self._create_tasks(client, 2, TaskStatus.CREATED)
+        created_at = client.get(f"/api/v1/tasks/{ids[1]}").json()["created_at"]
+
+        response = client.post("/api/v1/tasks/transition", json={
+            "from_status": TaskStatus.CREATED.value,
+            "to_status": TaskStatus.COMPLETED.value,
+            "created_before": created_at,
+            "ids": ids
+        })
+
+        assert response.json()["updated"] == 1
+        first = client.get(f"/api/v1/tasks/{ids[0]}").json()
+        assert first["status"] == TaskStatus.COMPLETED.value
+
+    def test_transition_aware_range(self, client: TestClient):
+        """Тест фильтрации по датам с timezone, отличным от БД."""
+        task_id = self._create_tasks(client, 1, TaskStatus.CREATED)[0]
+        now = datetime.now(timezone.utc)
+
+        response = client.post("/api/v1/tasks/transition", json={
+            "from_status": TaskStatus.CREATED.value,
+            "to_status": TaskStatus.COMPLETED.value,
+            "created_after": (now - timedelta(minutes=1)).astimezone(
+                timezone(timedelta(hours=5))
+            ).isoformat(),
+            "created_before": (now + timedelta(minutes=1)).isoformat(),
+            "ids": [task_id]
+        })
+
+        assert response.json()["updated"] == 1
+
+    def test_transition_invalid_status(self, client: TestClient):
+        """Тест валидации статуса."""
+        response = client.post("/api/v1/tasks/transition", json={
+            "from_status": "неверный_статус",
+            "to_status": TaskStatus.COMPLETED.value
+        })
+        assert response.status_code == 422
+
+
+class TestMsgpackAPI:
+    """Тесты для ответов и тел запросов в MessagePack."""
+
+    MSGPACK_HEADERS = {
+        "Accept": "application/msgpack",
+        "Content-Type": "application/msgpack",
+    }
+
+    def test_create_and_get_msgpack(self, client: TestClient):
+        """Тест создания и получения задачи в MessagePack."""
+        response = client.post(
+            "/api/v1/tasks/",
+            content=packb({"title": "  Задача  ", "status": "в работе"}),
+            headers=self.MSGPACK_HEADERS
+        )
+
+        assert response.status_code == 201
+        assert response.headers["content-type"] == "application/msgpack"
+        created = unpackb(response.content)
+        assert created["title"] == "Задача"
+        assert len(created["id"]) == 16
+
+        task_id = UUID(bytes=created["id"])
+        response = client.get(
+            f"/api/v1/tasks/{task_id}", headers=self.MSGPACK_HEADERS
+        )
+        assert unpackb(response.content) == created
+
+    def test_msgpack_dates_are_absolute(self, client: TestClient):
+        """Тест: даты в MessagePack совпадают с фактическим временем."""
+        before = datetime.now(timezone.utc)
+        response = client.post(
+            "/api/v1/tasks/",
+            json={"title": "Задача"},
+            headers={"Accept": "application/msgpack"}
+        )
+        after = datetime.now(timezone.utc)
+
+        created_at = unpackb(response.content)["created_at"]
+        assert before - timedelta(seconds=1) <= created_at
+        assert created_at <= after + timedelta(seconds=1)
+
+    def test_get_tasks_msgpack(self, client: TestClient):
+        """Тест получения списка задач в MessagePack."""
+        client.post("/api/v1/tasks/", json={"title": "Задача"})
+
+        response = client.get(
+            "/api/v1/tasks/?limit=5", headers=self.MSGPACK_HEADERS
+        )
+
+        assert response.status_code == 200
+        tasks = unpackb(response.content)
+        assert 1 <= len(tasks) <= 5
+        assert all(len(task["id"]) == 16 for task in tasks)
+
+    def test_update_msgpack(self, client: TestClient):
+        """Тест обновления задачи телом в MessagePack."""
+        task_id = client.post(
+            "/api/v1/tasks/", json={"title": "Задача"}
+        ).json()["id"]
+
+        response = client.put(
+            f"/api/v1/tasks/{task_id}",
+            content=packb({"status": TaskStatus.COMPLETED.value}),
+            headers={"Content-Type": "application/msgpack"}
+        )
+
+        assert response.status_code == 200
+        assert response.json()["status"] == TaskStatus.COMPLETED.value
+
+    def test_invalid_msgpack_body(self, client: TestClient):
+        """Тест некорректного тела в MessagePack."""
+        response = client.post(
+            "/api/v1/tasks/",
+            content=b"\xc1",
+            headers={"Content-Type": "application/msgpack"}
+        )
+        assert response.status_code == 400
@@ -0,0 +1,82 @@
+"""Тесты для бенчмарка схем."""
+import json
+import sys
+
+import pytest
+
+from benchmarks import bench_schemas
+from benchmarks.bench_schemas import build_cases, compare, measure
+
+
+class TestBenchSchemas:
+    """Тесты для сценариев и проверки регрессий бенчмарка схем."""
+
+    def test_cases_run(self):
+        """Тест выполнения всех сценариев."""
+        for func in build_cases(2).values():
+            assert len(func()) > 0
+
+    def test_measure(self):
+        """Тест измерения стоимости объекта."""
+        assert measure(lambda: None, 10, min_time=0.001, repeat=2) > 0
+
+    def test_compare_detects_regression(self):
+        """Тест обнаружения регрессии выше порога."""
+        baseline = {"create.init[1]": 1000.0, "update.init[1]": 1000.0}
+        current = {
+            "create.init[1]": 1200.0,
+            "update.init[1]": 1050.0,
+            "response.dump_json[1]": 5000.0,
+        }
+
+        regressions = compare(baseline, current, max_regression=10)
+
+        assert len(regressions) == 1
+        assert regressions[0].startswith("create.init[1]")
+
+
+class TestBenchSchemasBaseline:
+    """Тесты для сравнения с базовым результатом."""
+
+    @staticmethod
+    def _main(monkeypatch, tmp_path, *args):
+        """Запустить бенчмарк на минимальных сценариях."""
+        monkeypatch.setattr(bench_schemas, "_current_commit", lambda: "head")
+        monkeypatch.setattr(sys, "argv", [
+            "bench_schemas", "--sizes", "1", "--min-time", "0.0001",
+            "--repeat", "1", "--output-dir", str(tmp_path), *args
+        ])
+        bench_schemas.main()
+
+    def test_missing_latest_fails(self, monkeypatch, tmp_path):
+        """Тест ошибки при отсутствии базового результата для latest."""
+        with pytest.raises(SystemExit) as exc_info:
+            self._main(monkeypatch, tmp_path, "--compare", "latest")
+        assert exc_info.value.code == 2
+
+    def test_missing_commit_fails(self, monkeypatch, tmp_path):
+        """Тест ошибки при несуществующем хеше коммита."""
+        with pytest.raises(SystemExit) as exc_info:
+            self._main(monkeypatch, tmp_path, "--compare", "abc1234")
+        assert exc_info.value.code == 2
+
+    def test_missing_baseline_allowed(self, monkeypatch, tmp_path):
+        """Тест пропуска сравнения с --allow-missing-baseline."""
+        self._main(
+            monkeypatch, tmp_path,
+            "--compare", "latest", "--allow-missing-baseline"
+        )
+
+    def test_regression_fails(self, monkeypatch, tmp_path):
+        """Тест ошибки при регрессии относительно базового результата."""
+        results = {
+            key: 0.001
+            for key in bench_schemas.run([1], min_time=0.0001, repeat=1)
+        }
+        (tmp_path / "base.json").write_text(
+            json.dumps({"commit": "base", "results": results})
+        )
+
+        with pytest.raises(SystemExit) as exc_info:
+            self._main(monkeypatch, tmp_path, "--compare", "latest")
+        assert exc_info.value.code == 1
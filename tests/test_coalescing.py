@@ -0,0 +1,245 @@
+"""Тесты для объединения одинаковых запросов на чтение."""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy.orm import Session
+
+from app.coalescing import SingleFlight
+from app.config import settings
+from app.database import get_db
+from app.main import app
+from app.tasks import routes
+from app.tasks.schemas import TaskStatus
+from app.tasks.service import TaskService
+
+
+class TestSingleFlight:
+    """Тесты для single-flight загрузок."""
+
+    @staticmethod
+    def _slow_load(
+        started: threading.Event,
+        release: threading.Event,
+        calls: list,
+        result: bytes = b"result"
+    ):
+        """Загрузка, которая ждет сигнала release."""
+        def load():
+            calls.append(1)
+            started.set()
+            release.wait(5)
+            return result
+        return load
+
+    def test_concurrent_calls_share_load(self):
+        """Тест выполнения одной загрузки для одновременных запросов."""
+        flight = SingleFlight()
+        started, release, calls = threading.Event(), threading.Event(), []
+        load = self._slow_load(started, release, calls)
+
+        with ThreadPoolExecutor(max_workers=5) as executor:
+            leader = executor.submit(flight.do, "key", load)
+            started.wait(5)
+            followers = [
+                executor.submit(flight.do, "key", load) for _ in range(4)
+            ]
+            time.sleep(0.1)
+            release.set()
+            results = [leader.result()] + [f.result() for f in followers]
+
+        assert results == [b"result"] * 5
+        assert len(calls) == 1
+
+    def test_different_keys_not_shared(self):
+        """Тест независимости загрузок с разными ключами."""
+        flight = SingleFlight()
+        assert flight.do("a", lambda: b"a") == b"a"
+        assert flight.do("b", lambda: b"b") == b"b"
+
+    def test_no_reuse_without_ttl(self):
+        """Тест повторной загрузки после завершения при нулевом TTL."""
+        flight = SingleFlight(ttl_ms=0)
+        calls = []
+
+        def load():
+            calls.append(1)
+            return b"result"
+
+        flight.do("key", load)
+        flight.do("key", load)
+        assert len(calls) == 2
+
+    def test_reuse_within_ttl(self):
+        """Тест повторного использования результата в пределах TTL."""
+        flight = SingleFlight(ttl_ms=60000)
+        calls = []
+
+        def load():
+            calls.append(1)
+            return b"result"
+
+        flight.do("key", load)
+        flight.do("key", load)
+        assert len(calls) == 1
+
+    def test_forget_ends_sharing(self):
+        """Тест прекращения разделения результата после записи."""
+        flight = SingleFlight(ttl_ms=60000)
+        flight.do(("task", 1), lambda: b"old")
+        flight.do(("task", 2), lambda: b"other")
+
+        flight.forget(lambda key: key[1] == 1)
+
+        assert flight.do(("task", 1), lambda: b"new") == b"new"
+        assert flight.do(("task", 2), lambda: b"unused") == b"other"
+
+    def test_forget_during_load(self):
+        """Тест отказа от выполняющейся загрузки после записи."""
+        flight = SingleFlight()
+        started, release, calls = threading.Event(), threading.Event(), []
+        load = self._slow_load(started, release, calls, b"old")
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            leader = executor.submit(flight.do, "key", load)
+            started.wait(5)
+            flight.forget(lambda key: True)
+            assert flight.do("key", lambda: b"new") == b"new"
+            release.set()
+            assert leader.result() == b"old"
+
+    def test_follower_deadline(self):
+        """Тест самостоятельной загрузки после истечения ожидания."""
+        flight = SingleFlight()
+        started, release, calls = threading.Event(), threading.Event(), []
+        load = self._slow_load(started, release, calls, b"slow")
+
+        with ThreadPoolExecutor(max_workers=1) as executor:
+            leader = executor.submit(flight.do, "key", load)
+            started.wait(5)
+            began = time.monotonic()
+            result = flight.do("key", lambda: b"own", timeout=0.05)
+            elapsed = time.monotonic() - began
+            release.set()
+            assert leader.result() == b"slow"
+
+        assert result == b"own"
+        assert elapsed < 1
+
+    def test_error_not_shared(self):
+        """Тест самостоятельной загрузки ожидавших запросов при ошибке."""
+        flight = SingleFlight()
+        started, release = threading.Event(), threading.Event()
+
+        def failing_load():
+            started.set()
+            release.wait(5)
+            raise RuntimeError("ошибка")
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            leader = executor.submit(flight.do, "key", failing_load)
+            started.wait(5)
+            follower = executor.submit(flight.do, "key", lambda: b"own")
+            release.set()
+            with pytest.raises(RuntimeError):
+                leader.result()
+            assert follower.result() == b"own"
+
+
+@pytest.fixture
+def coalesced(monkeypatch):
+    """Объединение чтений с TTL, заведомо большим длительности теста."""
+    monkeypatch.setattr(settings, "COALESCE_READS", True)
+    monkeypatch.setattr(routes, "task_reads", SingleFlight(ttl_ms=60000))
+
+
+class TestCoalescedRoutes:
+    """Тесты для объединения чтений в маршрутах задач."""
+
+    def test_follower_respects_own_deadline(self, coalesced, monkeypatch):
+        """Тест: запрос не ждет чужую загрузку дольше своего дедлайна."""
+        started, release = threading.Event(), threading.Event()
+
+        def get_task(db, task_id):
+            if not started.is_set():
+                started.set()
+                release.wait(5)
+            return None
+
+        monkeypatch.setattr(TaskService, "get_task", staticmethod(get_task))
+        app.dependency_overrides[get_db] = lambda: Session()
+        url = "/api/v1/tasks/00000000-0000-0000-0000-000000000000"
+        try:
+            with TestClient(app) as client, ThreadPoolExecutor(1) as executor:
+                leader = executor.submit(client.get, url)
+                started.wait(5)
+                began = time.monotonic()
+                response = client.get(
+                    url, headers={"X-Request-Timeout": "100"}
+                )
+                elapsed = time.monotonic() - began
+                release.set()
+                assert leader.result().status_code == 404
+        finally:
+            app.dependency_overrides.clear()
+
+        assert response.status_code == 404
+        assert elapsed < 1
+
+    def test_update_ends_sharing(self, client: TestClient, coalesced):
+        """Тест: после обновления задача и список читаются заново."""
+        task = client.post("/api/v1/tasks/", json={"title": "Задача"}).json()
+        client.get(f"/api/v1/tasks/{task['id']}")
+        client.get("/api/v1/tasks/?limit=1000")
+
+        client.put(
+            f"/api/v1/tasks/{task['id']}",
+            json={"status": TaskStatus.COMPLETED.value}
+        )
+
+        fetched = client.get(f"/api/v1/tasks/{task['id']}").json()
+        assert fetched["status"] == TaskStatus.COMPLETED.value
+        listed = {
+            item["id"]: item
+            for item in client.get("/api/v1/tasks/?limit=1000").json()
+        }
+        assert listed[task["id"]]["status"] == TaskStatus.COMPLETED.value
+
+    def test_delete_ends_sharing(self, client: TestClient, coalesced):
+        """Тест: после удаления задача и список читаются заново."""
+        task = client.post("/api/v1/tasks/", json={"title": "Задача"}).json()
+        client.get(f"/api/v1/tasks/{task['id']}")
+        client.get("/api/v1/tasks/?limit=1000")
+
+        client.delete(f"/api/v1/tasks/{task['id']}")
+
+        response = client.get(f"/api/v1/tasks/{task['id']}")
+        assert response.status_code == 404
+        listed = client.get("/api/v1/tasks/?limit=1000").json()
+        assert task["id"] not in {item["id"] for item in listed}
+
+    def test_transition_ends_sharing(self, client: TestClient, coalesced):
+        """Тест: после массового перевода задачи читаются заново."""
+        task = client.post(
+            "/api/v1/tasks/",
+            json={"title": "Задача", "status": TaskStatus.IN_PROGRESS.value}
+        ).json()
+        client.get(f"/api/v1/tasks/{task['id']}")
+        client.get(
+            f"/api/v1/tasks/?status={TaskStatus.COMPLETED.value}&limit=1000"
+        )
+
+        client.post("/api/v1/tasks/transition", json={
+            "from_status": TaskStatus.IN_PROGRESS.value,
+            "to_status": TaskStatus.COMPLETED.value,
+            "ids": [task["id"]]
+        })
+
+        fetched = client.get(f"/api/v1/tasks/{task['id']}").json()
+        assert fetched["status"] == TaskStatus.COMPLETED.value
+        listed = client.get(
+            f"/api/v1/tasks/?status={TaskStatus.COMPLETED.value}&limit=1000"
+        ).json()
+        assert task["id"] in {item["id"] for item in listed}
@@ -0,0 +1,222 @@
+"""Тесты для дедлайнов запросов и отмены запросов к БД."""
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+from sqlalchemy.pool import QueuePool
+from sqlalchemy.exc import OperationalError
+
+from app import deadlines, metrics
+from app.deadlines import (
+    QUERY_CANCELLATIONS, DisconnectCancelMiddleware, RequestQueries,
+    is_query_canceled
+)
+from app.main import app
+
+
+class TestRequestQueries:
+    """Тесты для учета выполняющихся запросов."""
+
+    def test_cancel_registered_backends(self, monkeypatch):
+        """Тест отмены зарегистрированных backend-процессов."""
+        cancelled = []
+        monkeypatch.setattr(
+            deadlines, "_cancel_backend",
+            lambda engine, pid: cancelled.append((engine, pid))
+        )
+        queries = RequestQueries()
+        queries.register(1, "engine-1", 101)
+        queries.register(2, "engine-2", 102)
+        queries.unregister(2)
+
+        assert queries.cancel_all() == 1
+        assert cancelled == [("engine-1", 101)]
+        assert queries.disconnected is True
+
+    def test_register_after_disconnect(self):
+        """Тест запрета новых транзакций после отключения клиента."""
+        queries = RequestQueries()
+        queries.cancel_all()
+
+        with pytest.raises(ConnectionAbortedError):
+            queries.register(1, "engine", 101)
+
+
+class TestConnectionRelease:
+    """Тесты для снятия регистрации при возврате соединения в пул."""
+
+    @pytest.fixture
+    def engine(self):
+        """Движок SQLite с пулом из одного соединения."""
+        engine = create_engine(
+            "sqlite://",
+            connect_args={"check_same_thread": False},
+            poolclass=QueuePool,
+            pool_size=1,
+            max_overflow=0
+        )
+        yield engine
+        engine.dispose()
+
+    def test_unregister_on_checkin(self, engine, monkeypatch):
+        """Тест: соединение, вернувшееся в пул, не получает отмену."""
+        cancelled = []
+        monkeypatch.setattr(
+            deadlines, "_cancel_backend",
+            lambda engine, pid: cancelled.append(pid)
+        )
+        first, second = RequestQueries(), RequestQueries()
+
+        connection = engine.connect()
+        deadlines._register(connection, first, 101)
+        connection.close()
+        # То же соединение из пула достается другому запросу
+        connection = engine.connect()
+        deadlines._register(connection, second, 101)
+
+        assert first.cancel_all() == 0
+        assert cancelled == []
+        connection.close()
+        assert second.cancel_all() == 0
+
+    def test_checkin_waits_for_cancel(self, engine, monkeypatch):
+        """Тест: соединение не возвращается в пул во время отмены."""
+        cancelling, release = threading.Event(), threading.Event()
+
+        def slow_cancel(engine, pid):
+            cancelling.set()
+            release.wait(5)
+
+        monkeypatch.setattr(deadlines, "_cancel_backend", slow_cancel)
+        queries = RequestQueries()
+        connection = engine.connect()
+        deadlines._register(connection, queries, 101)
+
+        with ThreadPoolExecutor(max_workers=2) as executor:
+            cancel = executor.submit(queries.cancel_all)
+            cancelling.wait(5)
+            close = executor.submit(connection.close)
+            time.sleep(0.1)
+            assert not close.done()
+            release.set()
+            assert cancel.result() == 1
+            close.result()
+
+
+class TestDisconnectCancelMiddleware:
+    """Тесты для middleware отмены запросов."""
+
+    @staticmethod
+    def _run(inner_app, messages):
+        """Выполнить middleware с заданной последовательностью receive."""
+        scope = {"type": "http", "method": "GET", "path": "/"}
+        sent = []
+
+        async def receive():
+            if messages:
+                return messages.pop(0)
+            await asyncio.sleep(3600)
+
+        async def send(message):
+            sent.append(message)
+
+        asyncio.run(DisconnectCancelMiddleware(inner_app)(scope, receive, send))
+        return scope, sent
+
+    def test_cancel_on_disconnect(self, monkeypatch):
+        """Тест отмены запросов при отключении клиента."""
+        cancelled = []
+        monkeypatch.setattr(
+            deadlines, "_cancel_backend",
+            lambda engine, pid: cancelled.append(pid)
+        )
+        before = metrics.get(QUERY_CANCELLATIONS, reason="disconnect")
+
+        async def inner_app(scope, receive, send):
+            scope["state"]["queries"].register(1, "engine", 101)
+            assert (await receive())["type"] == "http.request"
+            assert (await receive())["type"] == "http.disconnect"
+            await asyncio.sleep(0.05)
+
+        self._run(inner_app, [
+            {"type": "http.request", "body": b"", "more_body": False},
+            {"type": "http.disconnect"},
+        ])
+
+        assert cancelled == [101]
+        after = metrics.get(QUERY_CANCELLATIONS, reason="disconnect")
+        assert after == before + 1
+
+    def test_no_cancel_after_response(self, monkeypatch):
+        """Тест отсутствия отмены после завершения ответа."""
+        cancelled = []
+        monkeypatch.setattr(
+            deadlines, "_cancel_backend",
+            lambda engine, pid: cancelled.append(pid)
+        )
+
+        async def inner_app(scope, receive, send):
+            await receive()
+            await send({"type": "http.response.start", "status": 200})
+            await send({"type": "http.response.body", "body": b"ok"})
+
+        _, sent = self._run(inner_app, [
+            {"type": "http.request", "body": b"", "more_body": False},
+        ])
+
+        assert cancelled == []
+        assert sent[-1]["body"] == b"ok"
+
+    def test_buffered_body(self):
+        """Тест передачи приложению тела запроса из буфера."""
+        received = []
+
+        async def inner_app(scope, receive, send):
+            received.append(await receive())
+            received.append(await receive())
+
+        self._run(inner_app, [
+            {"type": "http.request", "body": b"a", "more_body": True},
+            {"type": "http.request", "body": b"b", "more_body": False},
+        ])
+
+        assert [m["body"] for m in received] == [b"a", b"b"]
+
+
+class TestDeadlines:
+    """Тесты для дедлайнов запросов."""
+
+    def test_invalid_timeout_header(self):
+        """Тест валидации заголовка дедлайна."""
+        with TestClient(app) as client:
+            response = client.get(
+                "/api/v1/tasks/", headers={"X-Request-Timeout": "0"}
+            )
+        assert response.status_code == 422
+
+    def test_statement_timeout(self, db_session):
+        """Тест отмены запроса по дедлайну сессии."""
+        untrack = deadlines._track(db_session, time.monotonic() + 0.1, None)
+        try:
+            with pytest.raises(OperationalError) as exc_info:
+                db_session.execute(text("SELECT pg_sleep(2)"))
+        finally:
+            db_session.rollback()
+            untrack()
+
+        assert is_query_canceled(exc_info.value)
+
+    def test_deadline_not_leaked(self, db_session):
+        """Тест сброса statement_timeout после завершения транзакции."""
+        untrack = deadlines._track(db_session, time.monotonic() + 5, None)
+        db_session.execute(text("SELECT 1"))
+        db_session.commit()
+        untrack()
+
+        timeout = db_session.execute(text("SHOW statement_timeout")).scalar()
+        db_session.rollback()
+        assert timeout == "0"
@@ -0,0 +1,50 @@
+"""Тесты для генераторов ID задач."""
+import time
+
+from app.config import settings
+from app.tasks.ids import TASK_ID_GENERATORS, new_task_id, uuid7
+
+
+class TestUUID7:
+    """Тесты для генератора UUIDv7."""
+
+    def test_version_and_variant(self):
+        """Тест версии и варианта UUID."""
+        task_id = uuid7()
+        assert task_id.version == 7
+        assert task_id.variant == "specified in RFC 4122"
+
+    def test_timestamp_prefix(self):
+        """Тест времени в старших 48 битах."""
+        before = time.time_ns() // 1_000_000
+        task_id = uuid7()
+        after = time.time_ns() // 1_000_000
+        assert before <= task_id.int >> 80 <= after
+
+    def test_time_ordered(self):
+        """Тест упорядоченности ID, созданных в разные миллисекунды."""
+        first = uuid7()
+        time.sleep(0.002)
+        second = uuid7()
+        assert first < second
+
+    def test_unique(self):
+        """Тест уникальности ID в пределах одной миллисекунды."""
+        ids = {uuid7() for _ in range(10000)}
+        assert len(ids) == 10000
+
+
+class TestNewTaskId:
+    """Тесты для выбора генератора по настройкам."""
+
+    def test_generators(self):
+        """Тест доступных генераторов."""
+        assert TASK_ID_GENERATORS["uuid4"]().version == 4
+        assert TASK_ID_GENERATORS["uuid7"]().version == 7
+
+    def test_new_task_id_uses_setting(self, monkeypatch):
+        """Тест генерации ID выбранным генератором."""
+        monkeypatch.setattr(settings, "TASK_ID_VERSION", "uuid7")
+        assert new_task_id().version == 7
+        monkeypatch.setattr(settings, "TASK_ID_VERSION", "uuid4")
+        assert new_task_id().version == 4
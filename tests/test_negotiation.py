@@ -0,0 +1,156 @@
+"""Тесты для согласования формата JSON / MessagePack."""
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import msgpack
+import pytest
+from fastapi.testclient import TestClient
+
+from app.database import DB_TZ
+from app.main import app
+from app.negotiation import (
+    JSON, MSGPACK, encode, encode_task, encode_tasks, packb, unpackb,
+    wants_msgpack
+)
+from app.tasks.models import Task
+from app.tasks.schemas import TaskResponse, TaskStatus
+
+
+class TestWantsMsgpack:
+    """Тесты для выбора формата по заголовку Accept."""
+
+    @pytest.mark.parametrize("accept, expected", [
+        (None, False),
+        ("*/*", False),
+        ("application/json", False),
+        ("application/msgpack", True),
+        ("application/x-msgpack", True),
+        ("application/msgpack, application/json", True),
+        ("application/json, application/msgpack;q=0.5", False),
+        ("application/json;q=0.9, application/msgpack", True),
+        ("application/msgpack;q=0", False),
+    ])
+    def test_accept(self, accept, expected):
+        """Тест выбора MessagePack по весам типов."""
+        assert wants_msgpack(accept) is expected
+
+
+class TestMsgpackEncoding:
+    """Тесты для кодирования в MessagePack."""
+
+    def test_uuid_as_bin(self):
+        """Тест кодирования UUID в 16 байт."""
+        task_id = uuid.uuid4()
+        assert unpackb(packb(task_id)) == task_id.bytes
+
+    def test_naive_datetime_in_db_timezone(self):
+        """Тест кодирования даты из БД как времени в DB_TIMEZONE."""
+        value = datetime(2025, 8, 20, 11, 46, 26, 664881)
+
+        decoded = unpackb(packb(value))
+
+        assert decoded == value.replace(tzinfo=DB_TZ)
+        assert decoded.tzinfo == timezone.utc
+
+    def test_aware_datetime_unchanged(self):
+        """Тест кодирования даты с timezone без сдвига."""
+        value = datetime(
+            2025, 8, 20, 11, 46, 26, 664881,
+            tzinfo=timezone(timedelta(hours=5))
+        )
+        assert unpackb(packb(value)) == value
+
+    def test_encode_response(self):
+        """Тест кодирования ответа в обоих форматах."""
+        now = datetime.now()
+        response = TaskResponse(
+            id=uuid.uuid4(),
+            title="Задача",
+            status=TaskStatus.IN_PROGRESS,
+            created_at=now,
+            updated_at=now
+        )
+
+        data = unpackb(encode([response], MSGPACK))[0]
+        assert data["id"] == response.id.bytes
+        assert data["status"] == TaskStatus.IN_PROGRESS.value
+        assert TaskResponse.model_validate(data).id == response.id
+        assert encode([response], JSON) == (
+            b"[" + response.model_dump_json().encode() + b"]"
+        )
+
+
+class TestTaskEncoding:
+    """Тесты для кодирования задач из БД."""
+
+    @staticmethod
+    def _task(**fields) -> Task:
+        """Transient-объект Task с датами без timezone, как из БД."""
+        created_at = datetime(2025, 8, 20, 11, 46, 26, 664881)
+        return Task(**{
+            "id": uuid.uuid4(),
+            "title": "Задача",
+            "description": "Описание",
+            "status": TaskStatus.IN_PROGRESS.value,
+            "created_at": created_at,
+            "updated_at": created_at + timedelta(microseconds=1),
+            **fields,
+        })
+
+    @pytest.mark.parametrize("media_type", [JSON, MSGPACK])
+    def test_same_as_response(self, media_type: str):
+        """Тест совпадения с кодированием через TaskResponse."""
+        tasks = [self._task(), self._task(description=None)]
+        responses = [TaskResponse.model_validate(task) for task in tasks]
+
+        assert encode_tasks(tasks, media_type) == encode(responses, media_type)
+        assert encode_task(tasks[0], media_type) == (
+            encode(responses[0], media_type)
+        )
+
+    def test_equal_dates_shared(self):
+        """Тест кодирования одинаковых дат создания и обновления."""
+        task = self._task()
+        task.updated_at = task.created_at
+
+        data = unpackb(encode_task(task, MSGPACK))
+
+        assert data["created_at"] == task.created_at.replace(tzinfo=DB_TZ)
+        assert data["updated_at"] == data["created_at"]
+
+
+def _timestamp96(seconds: int) -> bytes:
+    """Расширение timestamp 96 с произвольным числом секунд."""
+    data = (0).to_bytes(4, "big") + seconds.to_bytes(8, "big", signed=True)
+    return b"\xc7\x0c\xff" + data
+
+
+class TestMsgpackRequestBody:
+    """Тесты для разбора тела запроса в MessagePack."""
+
+    HEADERS = {"Content-Type": MSGPACK}
+
+    @pytest.mark.parametrize("body", [
+        b"\x92\x01",
+        packb({"title": b"\xff\xfe"}),
+        b"\x81\xa5title" + _timestamp96(2 ** 63 - 1),
+        packb({"title": msgpack.ExtType(5, b"x")}),
+    ], ids=["truncated", "invalid_utf8", "timestamp_overflow", "ext_type"])
+    def test_malformed_body(self, body: bytes):
+        """Тест ответа 400 на некорректное тело MessagePack."""
+        with TestClient(app) as client:
+            response = client.post(
+                "/api/v1/tasks/", content=body, headers=self.HEADERS
+            )
+        assert response.status_code == 400
+
+    def test_validation_error_is_json(self):
+        """Тест ответа 422 с текстом вместо bin в ошибке валидации."""
+        with TestClient(app) as client:
+            response = client.post(
+                "/api/v1/tasks/",
+                content=packb({"title": b"x" * 101}),
+                headers=self.HEADERS
+            )
+        assert response.status_code == 422
+        assert response.json()["detail"][0]["input"] == "x" * 101